@@ -7,6 +7,7 @@ servers for MicroPython and standard Python.
 """
 import asyncio
 import io
+import os
 import re
 import time
 
@@ -651,19 +652,18 @@ class Response:
         self.complete()
 
         try:
-            # status code
+            # status line and headers, serialized once
             reason = self.reason if self.reason is not None else \
                 ('OK' if self.status_code == 200 else 'N/A')
-            await stream.awrite('HTTP/1.0 {status_code} {reason}\r\n'.format(
-                status_code=self.status_code, reason=reason).encode())
-
-            # headers
+            lines = ['HTTP/1.1 {status_code} {reason}\r\n'.format(
+                status_code=self.status_code, reason=reason)]
             for header, value in self.headers.items():
                 values = value if isinstance(value, list) else [value]
                 for value in values:
-                    await stream.awrite('{header}: {value}\r\n'.format(
-                        header=header, value=value).encode())
-            await stream.awrite(b'\r\n')
+                    lines.append('{header}: {value}\r\n'.format(
+                        header=header, value=value))
+            lines.append('\r\n')
+            head = ''.join(lines).encode()
 
             # body
             if not self.is_head:
@@ -671,8 +671,21 @@ class Response:
                 async for body in iter:
                     if isinstance(body, str):  # pragma: no cover
                         body = body.encode()
+                    if head is not None:
+                        # the head goes out in the same write as (up to one
+                        # buffer of) the first body chunk
+                        n = min(len(body), self.send_file_buffer_size)
+                        first = bytearray(len(head) + n)
+                        first[:len(head)] = head
+                        first[len(head):] = body[:n]
+                        chunks = (first,) if n == len(body) else \
+                            (first, memoryview(body)[n:])
+                        head = None
+                    else:
+                        chunks = (body,)
                     try:
-                        await stream.awrite(body)
+                        for chunk in chunks:
+                            await stream.awrite(chunk)
                     except OSError as exc:  # pragma: no cover
                         if exc.errno in MUTED_SOCKET_ERRORS or \
                                 exc.args[0] == 'Connection lost':
@@ -681,6 +694,9 @@ class Response:
                         raise
                 if hasattr(iter, 'aclose'):  # pragma: no branch
                     await iter.aclose()
+            if head is not None:
+                # no body to send it with
+                await stream.awrite(head)
 
         except OSError as exc:  # pragma: no cover
             if exc.errno in MUTED_SOCKET_ERRORS or \
@@ -810,6 +826,10 @@ class Response:
             headers['Content-Encoding'] = compressed \
                 if isinstance(compressed, str) else 'gzip'
 
+        if stream is None:
+            # a known length lets the connection be kept alive afterwards
+            headers['Content-Length'] = str(
+                os.stat(filename + file_extension)[6])
         f = stream or open(filename + file_extension, 'rb')
         return cls(body=f, status_code=status_code, headers=headers)
 
@@ -938,6 +958,19 @@ class Microdot:
         app = Microdot()
     """
 
+    #: Specify how many seconds an idle persistent (keep-alive) connection is
+    #: held open waiting for the client's next request. Set to 0 to close
+    #: every connection after one response.
+    #:
+    #: Example::
+    #:
+    #:    Microdot.keep_alive_timeout = 10
+    keep_alive_timeout = 5
+
+    #: Specify the maximum number of requests that are served on one
+    #: persistent connection before it is closed.
+    keep_alive_max_requests = 100
+
     def __init__(self):
         self.url_map = []
         self.before_request_handlers = []
@@ -948,6 +981,8 @@ class Microdot:
         self.options_handler = self.default_options_handler
         self.debug = False
         self.server = None
+        self._route_index = None
+        self._route_index_size = -1
 
     def route(self, url_pattern, methods=None):
         """Decorator that is used to register a function as a request handler
@@ -1331,26 +1366,69 @@ class Microdot:
         """
         self.server.close()
 
+    def _build_route_index(self):
+        # Routes with a fixed path go in a dict keyed by that path; the rest
+        # keep their regex. Positions in url_map are kept so that the first
+        # registered match still wins when both kinds match a path.
+        static = {}
+        dynamic = []
+        for pos, (methods, pattern, handler, url_prefix, subapp) in \
+                enumerate(self.url_map):
+            url = pattern.url_pattern
+            if '<' in url or any(c in url for c in '.^$*+?{}[]\\|()'):
+                dynamic.append((pos, methods, pattern, handler, url_prefix,
+                                subapp))
+            else:
+                static.setdefault('/' + url.lstrip('/'), []).append(
+                    (pos, methods, handler, url_prefix, subapp, None))
+        self._route_index = (static, dynamic)
+        self._route_index_size = len(self.url_map)
+
     def find_route(self, req):
         method = req.method.upper()
         if method == 'OPTIONS' and self.options_handler:
             return self.options_handler(req), '', None
         if method == 'HEAD':
             method = 'GET'
+        if self._route_index_size != len(self.url_map):
+            self._build_route_index()
+        static, dynamic = self._route_index
+
+        # a dynamic route can only take precedence over the static one that
+        # would handle the request if it was registered before it
+        routes = static.get(req.path, ())
+        stop = self._route_index_size
+        for route in routes:
+            if method in route[1]:
+                stop = route[0]
+                break
+        matched = None
+        for pos, methods, pattern, handler, url_prefix, subapp in dynamic:
+            if pos > stop:
+                break
+            args = pattern.match(req.path)
+            if args is not None:
+                if matched is None:
+                    matched = list(routes)
+                matched.append((pos, methods, handler, url_prefix, subapp,
+                                args))
+        if matched is not None:
+            routes = sorted(matched, key=lambda route: route[0])
+
         f = 404
         p = ''
         s = None
-        for route_methods, route_pattern, route_handler, url_prefix, subapp \
-                in self.url_map:
-            req.url_args = route_pattern.match(req.path)
-            if req.url_args is not None:
-                p = url_prefix
-                s = subapp
-                if method in route_methods:
-                    f = route_handler
-                    break
-                else:
-                    f = 405
+        req.url_args = None
+        for _, route_methods, route_handler, url_prefix, subapp, args \
+                in routes:
+            req.url_args = {} if args is None else args
+            p = url_prefix
+            s = subapp
+            if method in route_methods:
+                f = route_handler
+                break
+            else:
+                f = 405
         return f, p, s
 
     def default_options_handler(self, req):
@@ -1364,27 +1442,78 @@ class Microdot:
         return {'Allow': ', '.join(allow)}
 
     async def handle_request(self, reader, writer):
-        req = None
-        try:
-            req = await Request.create(self, reader, writer,
-                                       writer.get_extra_info('peername'))
-        except Exception as exc:  # pragma: no cover
-            print_exception(exc)
+        served = 0
+        while True:
+            req = None
+            try:
+                if served:
+                    # persistent connection: wait, up to the idle timeout,
+                    # for the client's next request
+                    req = await asyncio.wait_for(
+                        Request.create(self, reader, writer,
+                                       writer.get_extra_info('peername')),
+                        self.keep_alive_timeout)
+                    if req is None:
+                        break
+                else:
+                    req = await Request.create(
+                        self, reader, writer,
+                        writer.get_extra_info('peername'))
+            except asyncio.TimeoutError:
+                break
+            except Exception as exc:  # pragma: no cover
+                if served:
+                    break
+                print_exception(exc)
 
-        res = await self.dispatch_request(req)
+            res = await self.dispatch_request(req)
+            served += 1
+            keep_alive = res != Response.already_handled and \
+                self._keep_alive(req, res, served)
+            try:
+                if res != Response.already_handled:  # pragma: no branch
+                    await res.write(writer)
+            except OSError as exc:  # pragma: no cover
+                keep_alive = False
+                if exc.errno not in MUTED_SOCKET_ERRORS:
+                    raise
+            if self.debug and req:  # pragma: no cover
+                print('{method} {path} {status_code}'.format(
+                    method=req.method, path=req.path,
+                    status_code=res.status_code))
+            if not keep_alive:
+                break
         try:
-            if res != Response.already_handled:  # pragma: no branch
-                await res.write(writer)
             await writer.aclose()
         except OSError as exc:  # pragma: no cover
-            if exc.errno in MUTED_SOCKET_ERRORS:
-                pass
-            else:
+            if exc.errno not in MUTED_SOCKET_ERRORS:
                 raise
-        if self.debug and req:  # pragma: no cover
-            print('{method} {path} {status_code}'.format(
-                method=req.method, path=req.path,
-                status_code=res.status_code))
+
+    def _keep_alive(self, req, res, served):
+        """Decide whether the connection stays open after this response, and
+        add the matching ``Connection`` headers to it."""
+        keep_alive = False
+        if req and self.keep_alive_timeout and \
+                served < self.keep_alive_max_requests and \
+                req.content_length <= Request.max_body_length and \
+                'Transfer-Encoding' not in req.headers:
+            connection = req.headers.get('Connection', '').lower()
+            if req.http_version == '1.0':
+                keep_alive = connection == 'keep-alive'
+            else:
+                keep_alive = connection != 'close'
+        if keep_alive:
+            # the next response can only start once this body has a known end
+            res.complete()
+            keep_alive = 'Content-Length' in res.headers
+        if keep_alive:
+            res.headers['Connection'] = 'keep-alive'
+            res.headers['Keep-Alive'] = 'timeout={}, max={}'.format(
+                self.keep_alive_timeout,
+                self.keep_alive_max_requests - served)
+        else:
+            res.headers['Connection'] = 'close'
+        return keep_alive
 
     def get_request_handlers(self, req, attr, local_first=True):
         handlers = getattr(self, attr + '_handlers')
@@ -1,11 +1,68 @@
 import binascii
 import hashlib
+import io
+try:
+    import deflate
+except ImportError:  # pragma: no cover
+    deflate = None
+try:
+    import zlib
+except ImportError:  # pragma: no cover
+    zlib = None
 
 from libraries.microdot.microdot import Request, Response
 from libraries.microdot.microdot import MUTED_SOCKET_ERRORS, print_exception
 from libraries.microdot.helpers import wraps
 
 
+def _apply_mask(payload, mask):
+    """XOR a payload with a 4-byte WebSocket mask.
+
+    The payload and the repeated mask are each converted to a single integer
+    so the XOR runs over whole machine words in C, on both MicroPython and
+    CPython, instead of one Python-level step per byte.
+    """
+    length = len(payload)
+    if not length:
+        return b''
+    key = (mask * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')) \
+        .to_bytes(length, 'big')
+
+
+# permessage-deflate (RFC 7692) is only offered when a compressor exists:
+# MicroPython's ``deflate`` module, or ``zlib`` where it can compress (CPython)
+HAS_DEFLATE = deflate is not None or hasattr(zlib, 'compressobj')
+_DEFLATE_TAIL = b'\x00\x00\xff\xff'
+_DEFLATE_END = b'\x03\x00'  # empty final block, ends the stream cleanly
+
+
+def _deflate(payload, wbits):
+    """Compress one message as raw DEFLATE with a fresh ``2**wbits`` window."""
+    if deflate is not None:
+        buf = io.BytesIO()
+        d = deflate.DeflateIO(buf, deflate.RAW, wbits)
+        d.write(payload)
+        d.close()
+        data = buf.getvalue()
+    else:
+        c = zlib.compressobj(6, zlib.DEFLATED, -wbits)
+        data = c.compress(payload) + c.flush(zlib.Z_SYNC_FLUSH)
+    if data.endswith(_DEFLATE_TAIL):
+        data = data[:-4]
+    return data
+
+
+def _inflate(payload, wbits, max_length):
+    """Decompress one message, reading at most ``max_length + 1`` bytes so
+    an oversized message can be detected without inflating all of it."""
+    payload = payload + _DEFLATE_TAIL + _DEFLATE_END
+    if deflate is not None:
+        return deflate.DeflateIO(io.BytesIO(payload), deflate.RAW,
+                                 wbits).read(max_length + 1)
+    return zlib.decompressobj(-wbits).decompress(payload, max_length + 1)
+
+
 class WebSocketError(Exception):
     """Exception raised when an error occurs in a WebSocket connection."""
     pass
@@ -36,29 +93,133 @@ class WebSocket:
     #:    WebSocket.max_message_length = 4 * 1024  # up to 4KB messages
     max_message_length = -1
 
+    #: Subprotocols the server is willing to speak, in order of preference.
+    #: During the handshake the first one that the client also offers in
+    #: ``Sec-WebSocket-Protocol`` is selected and stored in the
+    #: ``subprotocol`` attribute of the connection. The default is an empty
+    #: list, which disables subprotocol negotiation.
+    #:
+    #: Example::
+    #:
+    #:    WebSocket.subprotocols = ['myapp.v2', 'myapp.v1']
+    subprotocols = []
+
+    #: Window size, as a power of two, for the permessage-deflate extension.
+    #: When a client offers the extension with ``client_max_window_bits``
+    #: it is accepted with no context takeover in either direction, so each
+    #: message is compressed on its own and memory use is bounded by this
+    #: window. Valid values are 9 to 15; the default of 0 disables
+    #: compression. It is also disabled when neither the ``deflate`` nor a
+    #: compressing ``zlib`` module is available.
+    #:
+    #: Example::
+    #:
+    #:    WebSocket.deflate_window_bits = 10  # 1KB window
+    deflate_window_bits = 0
+
+    #: Messages shorter than this many bytes are sent uncompressed even
+    #: when permessage-deflate is in use.
+    deflate_min_length = 64
+
     def __init__(self, request):
         self.request = request
         self.closed = False
+        self.subprotocol = None
+        self.deflate_wbits = 0
+        self._inflate_wbits = 0
+        self._fragment_opcode = 0
+        self._fragment_buffer = None
+        #: Number of frames received from the client, including control
+        #: frames such as pongs. Can be used to detect a dead peer.
+        self.received_frames = 0
 
     async def handshake(self):
         response = self._handshake_response()
+        head = b'HTTP/1.1 101 Switching Protocols\r\n' \
+            b'Upgrade: websocket\r\n' \
+            b'Connection: Upgrade\r\n'
+        if self.subprotocol:
+            head += b'Sec-WebSocket-Protocol: ' + \
+                self.subprotocol.encode() + b'\r\n'
+        if self.deflate_wbits:
+            head += ('Sec-WebSocket-Extensions: permessage-deflate; '
+                     'server_no_context_takeover; client_no_context_takeover; '
+                     'server_max_window_bits={}; client_max_window_bits={}'
+                     '\r\n').format(self.deflate_wbits,
+                                     self._inflate_wbits).encode()
         await self.request.sock[1].awrite(
-            b'HTTP/1.1 101 Switching Protocols\r\n')
-        await self.request.sock[1].awrite(b'Upgrade: websocket\r\n')
-        await self.request.sock[1].awrite(b'Connection: Upgrade\r\n')
-        await self.request.sock[1].awrite(
-            b'Sec-WebSocket-Accept: ' + response + b'\r\n\r\n')
+            head + b'Sec-WebSocket-Accept: ' + response + b'\r\n\r\n')
 
     async def receive(self):
-        """Receive a message from the client."""
+        """Receive a message from the client.
+
+        Fragmented messages are reassembled, up to the size given by
+        ``max_message_length``.
+        """
+        message = None
         while True:
-            opcode, payload = await self._read_frame()
-            send_opcode, data = self._process_websocket_frame(opcode, payload)
-            if send_opcode:  # pragma: no cover
-                await self.send(data, send_opcode)
-            elif data:  # pragma: no branch
+            opcode, data, fin = await self.receive_fragment()
+            if not fin or message is not None:
+                if message is None:
+                    message = bytearray()
+                message += data
+                if len(message) > self._max_length():
+                    raise WebSocketError('Message too large')
+                if not fin:
+                    continue
+                data = bytes(message)
+                message = None
+            if opcode == self.TEXT:
+                data = data.decode()
+            if data:  # pragma: no branch
                 return data
 
+    async def receive_fragment(self):
+        """Receive the next piece of a message from the client, as soon as it
+        arrives.
+
+        The return value is a tuple ``(opcode, data, fin)``. ``opcode`` is
+        ``TEXT`` or ``BINARY`` for every piece of a message, ``data`` is the
+        payload as bytes (text is not decoded, since a fragment may end in
+        the middle of a UTF-8 character) and ``fin`` is true for the last
+        piece. Only the size of each frame is checked against
+        ``max_message_length``, so this method can be used to stream
+        messages that are too large to hold in memory. Compressed messages
+        are the exception: they are reassembled, inflated and returned as a
+        single piece.
+        """
+        while True:
+            fin, opcode, compressed, payload = await self._read_frame()
+            if opcode >= self.CLOSE:
+                # control frames may arrive between the pieces of a message
+                send_opcode, data = self._process_websocket_frame(
+                    opcode, payload)
+                if send_opcode:  # pragma: no cover
+                    await self.send(data, send_opcode)
+                continue
+            if opcode == self.CONT:
+                if not self._fragment_opcode:
+                    raise WebSocketError('Unexpected continuation frame')
+                opcode = self._fragment_opcode
+            elif self._fragment_opcode:
+                raise WebSocketError('Expected a continuation frame')
+            elif compressed:
+                self._fragment_buffer = bytearray()
+            self._fragment_opcode = 0 if fin else opcode
+            if self._fragment_buffer is None:
+                return opcode, payload, bool(fin)
+
+            self._fragment_buffer += payload
+            if len(self._fragment_buffer) > self._max_length():
+                raise WebSocketError('Message too large')
+            if fin:
+                payload = _inflate(self._fragment_buffer,
+                                   self._inflate_wbits, self._max_length())
+                self._fragment_buffer = None
+                if len(payload) > self._max_length():
+                    raise WebSocketError('Message too large')
+                return opcode, payload, True
+
     async def send(self, data, opcode=None):
         """Send a message to the client.
 
@@ -67,11 +228,44 @@ class WebSocket:
                        is ``TEXT`` or ``BINARY`` depending on the type of the
                        data.
         """
-        frame = self._encode_websocket_frame(
-            opcode or (self.TEXT if isinstance(data, str) else self.BINARY),
-            data)
+        await self.request.sock[1].awrite(
+            self.encode_frame(data, opcode, self.deflate_wbits))
+
+    async def send_frame(self, frame):
+        """Send a frame previously built with :meth:`encode_frame`.
+
+        This allows a message that goes to many clients to be encoded once
+        and the same buffer written to every socket.
+
+        :param frame: the complete wire frame.
+        """
         await self.request.sock[1].awrite(frame)
 
+    @classmethod
+    def encode_frame(cls, data, opcode=None, deflate_wbits=0):
+        """Build the wire frame for a message.
+
+        :param data: the data to send, given as a string or bytes.
+        :param opcode: a custom frame opcode to use. If not given, the opcode
+                       is ``TEXT`` or ``BINARY`` depending on the type of the
+                       data.
+        :param deflate_wbits: the ``deflate_wbits`` of the connection(s) the
+                              frame is for. When non-zero, data messages of
+                              at least ``deflate_min_length`` bytes are
+                              compressed. The frame carries no compression
+                              context, so it can go to any connection that
+                              negotiated the same window.
+        """
+        opcode = opcode or (cls.TEXT if isinstance(data, str)
+                            else cls.BINARY)
+        if deflate_wbits and opcode in (cls.TEXT, cls.BINARY):
+            if isinstance(data, str):
+                data = data.encode()
+            if len(data) >= cls.deflate_min_length:
+                return cls._encode_websocket_frame(
+                    opcode, _deflate(data, deflate_wbits), 0x40)
+        return cls._encode_websocket_frame(opcode, data)
+
     async def close(self):
         """Close the websocket connection."""
         if not self.closed:  # pragma: no cover
@@ -94,18 +288,54 @@ class WebSocket:
                     return self.request.app.abort(400)
             elif h == 'sec-websocket-key':
                 websocket_key = value
+            elif h == 'sec-websocket-protocol':
+                offered = [p.strip() for p in value.split(',')]
+                for protocol in self.subprotocols:
+                    if protocol in offered:
+                        self.subprotocol = protocol
+                        break
+            elif h == 'sec-websocket-extensions':
+                self._negotiate_deflate(value)
         if not connection or not upgrade or not websocket_key:
             return self.request.app.abort(400)
         d = hashlib.sha1(websocket_key.encode())
         d.update(b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11')
         return binascii.b2a_base64(d.digest())[:-1]
 
+    def _negotiate_deflate(self, value):
+        wbits = self.deflate_window_bits
+        if not wbits or not HAS_DEFLATE:
+            return
+        for offer in value.split(','):
+            params = [p.strip() for p in offer.split(';')]
+            if params[0] != 'permessage-deflate':
+                continue
+            server_wbits = wbits
+            client_wbits = 0
+            for param in params[1:]:
+                name, _, arg = param.partition('=')
+                arg = arg.strip().strip('"')
+                if name == 'server_max_window_bits':
+                    server_wbits = min(wbits, int(arg))
+                elif name == 'client_max_window_bits':
+                    client_wbits = min(wbits, int(arg)) if arg else wbits
+            # without client_max_window_bits the client may use a 32KB
+            # window, which would make inflating its messages unbounded
+            if server_wbits >= 9 and client_wbits >= 9:
+                self.deflate_wbits = server_wbits
+                self._inflate_wbits = client_wbits
+                return
+
+    def _max_length(self):
+        return Request.max_body_length if self.max_message_length == -1 \
+            else self.max_message_length
+
     @classmethod
     def _parse_frame_header(cls, header):
         fin = header[0] & 0x80
         opcode = header[0] & 0x0f
-        if fin == 0 or opcode == cls.CONT:  # pragma: no cover
-            raise WebSocketError('Continuation frames not supported')
+        if fin == 0 and opcode >= cls.CLOSE:  # pragma: no cover
+            raise WebSocketError('Fragmented control frame')
         has_mask = header[1] & 0x80
         length = header[1] & 0x7f
         if length == 126:
@@ -128,43 +358,53 @@ class WebSocket:
         return None, payload
 
     @classmethod
-    def _encode_websocket_frame(cls, opcode, payload):
-        frame = bytearray()
-        frame.append(0x80 | opcode)
-        if opcode == cls.TEXT:
+    def _encode_websocket_frame(cls, opcode, payload, rsv=0):
+        if isinstance(payload, str):
             payload = payload.encode()
-        if len(payload) < 126:
-            frame.append(len(payload))
-        elif len(payload) < (1 << 16):
-            frame.append(126)
-            frame.extend(len(payload).to_bytes(2, 'big'))
+        length = len(payload)
+        if length < 126:
+            offset = 2
+        elif length < (1 << 16):
+            offset = 4
+        else:
+            offset = 10
+        # single allocation: header and payload in one preallocated buffer
+        frame = bytearray(offset + length)
+        frame[0] = 0x80 | rsv | opcode
+        if offset == 2:
+            frame[1] = length
+        elif offset == 4:
+            frame[1] = 126
+            frame[2:4] = length.to_bytes(2, 'big')
         else:
-            frame.append(127)
-            frame.extend(len(payload).to_bytes(8, 'big'))
-        frame.extend(payload)
+            frame[1] = 127
+            frame[2:10] = length.to_bytes(8, 'big')
+        frame[offset:] = payload
         return frame
 
     async def _read_frame(self):
         header = await self.request.sock[0].read(2)
         if len(header) != 2:  # pragma: no cover
             raise WebSocketError('Websocket connection closed')
+        self.received_frames += 1
         fin, opcode, has_mask, length = self._parse_frame_header(header)
+        compressed = header[0] & 0x40
+        if compressed and not self._inflate_wbits:
+            raise WebSocketError('Unexpected compressed frame')
         if length == -2:
             length = await self.request.sock[0].readexactly(2)
             length = int.from_bytes(length, 'big')
         elif length == -8:
             length = await self.request.sock[0].readexactly(8)
             length = int.from_bytes(length, 'big')
-        max_allowed_length = Request.max_body_length \
-            if self.max_message_length == -1 else self.max_message_length
-        if length > max_allowed_length:
+        if length > self._max_length():
             raise WebSocketError('Message too large')
         if has_mask:  # pragma: no cover
             mask = await self.request.sock[0].readexactly(4)
         payload = await self.request.sock[0].readexactly(length)
         if has_mask:  # pragma: no cover
-            payload = bytes(x ^ mask[i % 4] for i, x in enumerate(payload))
-        return opcode, payload
+            payload = _apply_mask(payload, mask)
+        return fin, opcode, compressed, payload
 
 
 async def websocket_upgrade(request):
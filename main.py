@@ -1,8 +1,9 @@
 import asyncio
+import os
 
-from libraries.microdot.microdot import Microdot, Response, send_file
+from libraries.microdot.microdot import Microdot, Response
 from libraries.microdot.utemplate import Template
-from libraries.microdot.websocket import with_websocket
+from libraries.microdot.websocket import WebSocket, with_websocket
 from libraries.oled.ssd1306 import SSD1306I2C
 from src.config_loader import load_config
 
@@ -11,22 +12,47 @@ from src.display_controller import DisplayController
 
 from src.logger import Logger
 from src.screensaver import Screensaver
+from src.static_files import StaticFiles
 from src.websocket_manager import WebsocketManager
+from src.ws_input import WebsocketInput
 from src.picobridge import PicoBridge
+from src.response_cache import ResponseCache
 from src.telnet import TELNET_INIT
+from src.ws_protocol import BINARY_SUBPROTOCOL
 
 
 config_file: str = 'config.json'
 config = load_config(filename=config_file)
 
 app: Microdot = Microdot()
+app.keep_alive_timeout = config.get('picobridge').get('webservice').get('keep_alive_s')
+app.keep_alive_max_requests = config.get('picobridge').get('webservice').get('keep_alive_max_requests')
 
 Response.default_content_type = 'text/html'
+WebSocket.subprotocols = [BINARY_SUBPROTOCOL]
+WebSocket.deflate_window_bits = config.get('picobridge').get('websocket').get('deflate_window_bits')
 STATIC_FOLDER: str = "static/"
+INDEX_TEMPLATE: str = "index.html"
+INDEX_ASSETS: tuple = ('favicon.ico', 'styles.css', 'app.js', 'picobridge.jpg')
+
+response_cache: ResponseCache = ResponseCache(
+    max_bytes=config.get('picobridge').get('webservice').get('cache_bytes'),
+    max_entry_bytes=config.get('picobridge').get('webservice').get('cache_entry_bytes')
+)
+
+static_files: StaticFiles = StaticFiles(
+    folder=STATIC_FOLDER,
+    hashed_max_age=config.get('picobridge').get('webservice').get('static_max_age_s'),
+    cache=response_cache
+)
 
 logger: Logger = Logger("Main")
 
-websocket_manager: WebsocketManager = WebsocketManager()
+websocket_manager: WebsocketManager = WebsocketManager(
+    max_queue_bytes=config.get('picobridge').get('websocket').get('queue_bytes'),
+    ping_interval_s=config.get('picobridge').get('websocket').get('ping_interval_s'),
+    ping_timeout_s=config.get('picobridge').get('websocket').get('ping_timeout_s')
+)
 
 display: SSD1306I2C = get_display(
     i2c_id=config.get('picobridge').get('display').get('i2c').get('id'),
@@ -50,7 +76,7 @@ pico_bridge: PicoBridge = PicoBridge(
 
 async def handle_client(reader, writer) -> None:
     stop_flag = [False]
-    pico_bridge.clients.append(writer)
+    client = pico_bridge.add_client(writer, preamble=TELNET_INIT)
 
     try:
         peer = writer.get_extra_info('peername')
@@ -63,21 +89,13 @@ async def handle_client(reader, writer) -> None:
     except Exception as e:
         logger.info(f"Client connected (IP unknown): {e}")
 
-    try:
-        writer.write(TELNET_INIT)
-        await writer.drain()
-
-    except Exception as e:
-        logger.info(f"Error sending TELNET_INIT: {e}")
-
     pico_bridge.wake_uart()
 
     try:
         await asyncio.gather(pico_bridge.client_to_uart(reader, writer, stop_flag))
 
     finally:
-        if writer in pico_bridge.clients:
-            pico_bridge.clients.remove(writer)
+        pico_bridge.remove_client(client)
 
         try:
             writer.close()
@@ -95,14 +113,21 @@ async def handle_client(reader, writer) -> None:
 
 @app.get('/static/<path:path>')
 async def static(req, path):
-    if '..' in path:
-        return 'Not found', 404
-
-    return send_file(STATIC_FOLDER + path)
+    return static_files.response(req, path)
 
 @app.get('/')
 async def index(req):
-    return Template(template='index.html').render(version=pico_bridge.get_version())
+    # the page embeds the version and the asset hashes: a change to either,
+    # or to the template itself, renders it again
+    validator = (pico_bridge.get_version(), os.stat('templates/' + INDEX_TEMPLATE)[8],
+                 tuple(static_files.url(name) for name in INDEX_ASSETS))
+
+    body = response_cache.get('/', validator)
+    if body is None:
+        html = Template(template=INDEX_TEMPLATE).render(version=pico_bridge.get_version(), static_url=static_files.url)
+        body = response_cache.put('/', validator, html.encode())
+
+    return body
 
 
 @app.route('/ws')
@@ -118,19 +143,44 @@ async def ws_handler(request, ws):
 
     websocket_manager.register(ws)
 
+    history = pico_bridge.get_scrollback_frames()
+    if history:
+        try:
+            await websocket_manager.send(ws, {'output': history})
+
+        except Exception as e:
+            logger.info(f"Error sending scrollback: {e}")
+
+    async def on_input(data) -> None:
+        websocket_manager.begin_input(ws)
+        try:
+            reply = await pico_bridge.handle_websocket_input(data, ws)
+
+        finally:
+            websocket_manager.end_input(ws)
+
+        if reply:
+            await websocket_manager.send(ws, reply)
+
+    async def on_drop(head: bytes) -> None:
+        await websocket_manager.send(ws, pico_bridge.reject_websocket_input(head))
+
+    ws_input = WebsocketInput(
+        on_input,
+        max_text_bytes=config.get('picobridge').get('websocket').get('max_message_bytes'),
+        on_drop=on_drop
+    )
+
     try:
         while True:
             try:
-                data = await ws.receive()
+                opcode, data, fin = await ws.receive_fragment()
             except Exception as e:
                 logger.info(f"WebSocket receive error: {e}")
                 break
 
-            if data is None:
-                break
-
             try:
-                await pico_bridge.handle_websocket_input(data)
+                await ws_input.feed(opcode, data, fin)
 
             except Exception as e:
                 logger.info(f"Error handling websocket input: {e}")
@@ -200,6 +250,22 @@ async def identify_stop(req):
     await pico_bridge.identify_stop()
     return {'message': 'identify stopped'}
 
+@app.get('/api/v1/pb/clients')
+async def clients(req):
+    return {'clients': pico_bridge.get_client_stats()}
+
+@app.get('/api/v1/pb/websockets')
+async def websockets(req):
+    return {'websockets': websocket_manager.get_stats(), 'keepalive': websocket_manager.get_keepalive_stats()}
+
+@app.get('/api/v1/pb/http')
+async def http_stats(req):
+    return {'cache': response_cache.get_stats(), 'static': static_files.get_stats()}
+
+@app.get('/api/v1/pb/system')
+async def system(req):
+    return await pico_bridge.get_system_info()
+
 @app.get('/api/v1/pb/identify')
 async def identify(req):
     result = await pico_bridge.get_identify()
@@ -217,6 +283,7 @@ async def start_microdot(ip: str) -> None:
 
 
 async def main() -> None:
+    websocket_manager.start()
     await pico_bridge.start()
     ip_address: str = pico_bridge.get_ip_address()
     tcp_port: int = pico_bridge.get_tcp_port()
@@ -8,6 +8,7 @@ DEFAULT_CONFIG = {
         "plugged_device": "",
         "location": "",
         "port": 2222,
+        "telnet": {"queue_bytes": 8192, "overflow": "drop", "coalesce_ms": 5, "coalesce_bytes": 512},
         "wlan": {
             "is_ad_hoc": True,
             "ad_hoc": {"ssid": "PicoBridge", "psk": "pico1234"},
@@ -15,11 +16,30 @@ DEFAULT_CONFIG = {
         },
         "uart": {
             "physical": {"uart_id": 0, "tx_gp": 0, "rx_gp": 1},
-            "settings": {"baudrate": 9600, "bits": 8, "parity": None, "stop": 1}
+            "settings": {"baudrate": 9600, "bits": 8, "parity": None, "stop": 1},
+            "rx": {"buffer_size": 512, "scrollback_size": 4096},
+            "tx": {"inter_char_ms": 0, "inter_line_ms": 0, "chunk_size": 32,
+                   "paste_mode": "rate", "paste_prompt_timeout_ms": 3000}
         },
         "display": {"i2c": {"id": 1, "sda_gp": 18, "scl_gp": 19}},
+        "terminal": {
+            "idle_flush_ms": 150,
+            "prompt_profile": "default",
+            "extra_prompts": [],
+            "prompt_profiles": {
+                "default": ["Username:", "Password:", "login:", "--More--"],
+                "cisco_ios": ["Username:", "Password:", " --More-- ", "[yes/no]", "[confirm]", "Press RETURN to get started"],
+                "junos": ["login:", "Password:", "---(more", "[yes,no]"],
+                "linux": ["login:", "Password:", "--More--", "(END)", "Press any key"]
+            }
+        },
         "screensaver": {"enabled": True, "timeout_s": 30},
-        "webservice": {"port": 8080}
+        "telemetry": {"activity_ms": 50, "throughput_ms": 1000, "system_ms": 1000},
+        "websocket": {"queue_bytes": 16384, "max_message_bytes": 16384, "deflate_window_bits": 10,
+                      "ping_interval_s": 20, "ping_timeout_s": 10},
+        "webservice": {"port": 8080, "keep_alive_s": 5, "keep_alive_max_requests": 20,
+                       "static_max_age_s": 31536000,
+                       "cache_bytes": 32768, "cache_entry_bytes": 12288}
     }
 }
 
@@ -0,0 +1,54 @@
+import asyncio
+
+from src.logger import Logger
+
+PASTE_RATE: str = 'rate'
+PASTE_PROMPT: str = 'prompt'
+
+
+class PasteStreamer:
+    """Feeds a pasted block to the UART one line at a time.
+
+    In 'rate' mode pacing is left to UartTx (line rate plus inter_line_ms).
+    In 'prompt' mode each line waits for the device to show a prompt again
+    (prompt_event, set by whoever watches RX) before the next is sent.
+    """
+    def __init__(self, uart_tx, prompt_event: asyncio.Event, prompt_timeout_ms: int = 3000) -> None:
+        self._uart_tx = uart_tx
+        self._prompt_event: asyncio.Event = prompt_event
+        self._prompt_timeout_ms: int = prompt_timeout_ms
+        self._logger: Logger = Logger("PasteStreamer")
+
+    async def send(self, text: str, crlf_to_uart: bool, mode: str = PASTE_RATE, final: bool = True) -> tuple:
+        """Returns (lines sent, bytes sent, error or None). Unless final, text may end
+        mid-line (a long line split across chunks) and that piece goes out unterminated."""
+        terminator = b'\r' if crlf_to_uart else b'\n'
+        lines = sent = 0
+        start = 0
+        n = len(text)
+
+        while start < n:
+            nl = text.find('\n', start)
+            if nl == -1 and not final:
+                sent += await self._uart_tx.write(text[start:].encode())
+                break
+
+            end = n if nl == -1 else nl
+            line = text[start:end].rstrip('\r').encode() + terminator
+            start = end + 1
+
+            if mode == PASTE_PROMPT:
+                self._prompt_event.clear()
+
+            sent += await self._uart_tx.write(line)
+            lines += 1
+
+            if mode == PASTE_PROMPT:
+                try:
+                    await asyncio.wait_for(self._prompt_event.wait(), self._prompt_timeout_ms / 1000)
+
+                except asyncio.TimeoutError:
+                    self._logger.info(f"No prompt {self._prompt_timeout_ms} ms after line {lines}, stopping paste")
+                    return lines, sent, 'timeout'
+
+        return lines, sent, None
@@ -6,22 +6,37 @@ from network import WLAN
 
 from src.display_controller import DisplayController
 from src.file_handlers import write_file_as_json
+from src.paste import PASTE_PROMPT, PASTE_RATE, PasteStreamer
+from src.scrollback import Scrollback
 from src.terminal_framer import TerminalFramer
+from src.terminal_output import TerminalOutput
 from src.websocket_manager import WebsocketManager
 from src.system_monitor import SystemMonitor
-from src.telnet import telnet_negotiation
+from src.telnet import TelnetParser, telnet_escape
+from src.telnet_client import TelnetClient
+from src.telemetry import TelemetryScheduler
+from src.uart_rx import UartReader
+from src.uart_tx import UartTx, translate_crlf
 from src.wlan import wlan_ap_mode, wlan_infra_mode
 from src.logger import Logger
 
 
 class PicoBridge:
     def __init__(self, display_controller: DisplayController, ws_manager: WebsocketManager, config: dict, config_path: str = 'config.json') -> None:
-        self._terminal_framer: TerminalFramer = TerminalFramer()
         self._system_monitor: SystemMonitor = SystemMonitor()
 
         self._ws_manager: WebsocketManager = ws_manager
         self._config_path: str = config_path
         self._config: dict = config
+
+        # Terminal framing: prompt/pager tokens from the plugged device's profile
+        terminal_conf: dict = self._config.get('picobridge').get('terminal', {})
+        self._idle_flush_ms: int = terminal_conf.get('idle_flush_ms', 150)
+        self._prompt_tokens: list = self._get_prompt_tokens(terminal_conf)
+        # set whenever the framer pushes out a prompt (a token or an idle partial line)
+        self._prompt_seen: asyncio.Event = asyncio.Event()
+        self._terminal_framer: TerminalFramer = self._new_framer(on_prompt=self._prompt_seen.set)
+        self._terminal_output: TerminalOutput = TerminalOutput(self._terminal_framer, ws_manager)
         self._logger: Logger = Logger("[PicoBridge]")
 
         self._display_controller: DisplayController = display_controller
@@ -32,7 +47,12 @@ class PicoBridge:
         self._identify_task = None
 
         # State
-        self.clients = []
+        self.clients: list[TelnetClient] = []
+        telnet_conf: dict = self._config.get('picobridge').get('telnet', {})
+        self._client_queue_bytes: int = telnet_conf.get('queue_bytes', 8192)
+        self._client_overflow: str = telnet_conf.get('overflow', 'drop')
+        self._client_coalesce_ms: int = telnet_conf.get('coalesce_ms', 5)
+        self._client_coalesce_bytes: int = telnet_conf.get('coalesce_bytes', 512)
 
         self._tx_activity: bool = False
         self._rx_activity: bool = False
@@ -44,6 +64,17 @@ class PicoBridge:
         self._rx_rate: int = 0
         self._tx_rate: int = 0
 
+        telemetry_conf: dict = self._config.get('picobridge').get('telemetry', {})
+        self._telemetry: TelemetryScheduler = TelemetryScheduler(
+            ws_manager,
+            activity=self._activity_part,
+            throughput=self._throughput_part,
+            system=self._system_part,
+            activity_ms=telemetry_conf.get('activity_ms', 50),
+            throughput_ms=telemetry_conf.get('throughput_ms', 1000),
+            system_ms=telemetry_conf.get('system_ms', 1000)
+        )
+
         # Setup PluggedDevice/Location
         self._plugged_device: str = self._config.get('picobridge').get('plugged_device', "")
         self._location: str = self._config.get('picobridge').get('location', "")
@@ -63,14 +94,44 @@ class PicoBridge:
 
         # Init UART
         self._uart = None
+        tx_conf: dict = self._config.get('picobridge').get('uart').get('tx', {})
+        self._uart_tx: UartTx = UartTx(
+            inter_char_ms=tx_conf.get('inter_char_ms', 0),
+            inter_line_ms=tx_conf.get('inter_line_ms', 0),
+            chunk_size=tx_conf.get('chunk_size', 32)
+        )
+        self._paste_mode: str = tx_conf.get('paste_mode', PASTE_RATE)
+        self._paste: PasteStreamer = PasteStreamer(
+            self._uart_tx,
+            self._prompt_seen,
+            prompt_timeout_ms=tx_conf.get('paste_prompt_timeout_ms', 3000)
+        )
+        rx_conf: dict = self._config.get('picobridge').get('uart').get('rx', {})
+        self._rx_buffer_size: int = rx_conf.get('buffer_size', 512)
+        self._scrollback: Scrollback = Scrollback(size=rx_conf.get('scrollback_size', 4096))
+        self._system_monitor.register_buffer('uart_rx', self._rx_buffer_size)
+        self._system_monitor.register_buffer('scrollback', self._scrollback.get_size())
         self._crlf_to_uart: bool = True
         self._uart_to_crlf: bool = False
 
         self._logger.info(f"PicoBridge v{self._version} Starting")
 
+    @staticmethod
+    def _get_prompt_tokens(terminal_conf: dict) -> list:
+        profiles: dict = terminal_conf.get('prompt_profiles', {})
+        tokens: list = list(profiles.get(terminal_conf.get('prompt_profile', 'default'), []))
+
+        for tok in terminal_conf.get('extra_prompts', []):
+            if tok not in tokens:
+                tokens.append(tok)
+
+        return tokens
+
+    def _new_framer(self, on_prompt=None) -> TerminalFramer:
+        return TerminalFramer(idle_flush_ms=self._idle_flush_ms, flush_tokens=self._prompt_tokens, on_prompt=on_prompt)
+
     async def start(self) -> None:
         await self._system_monitor.start()
-        asyncio.create_task(self._monitor_system())
 
         await self._display_controller.start()
         await self._display_controller.add_highlight(line=1)
@@ -80,10 +141,13 @@ class PicoBridge:
         await self.start_uart()
 
         asyncio.create_task(self._uart_to_clients())
-        asyncio.create_task(self._monitor_throughput())
+        asyncio.create_task(self._terminal_output.run())
+
+        await self._display_controller.set_line_alignment(line=3, alignment="left")
+        await self._display_controller.set_line_alignment(line=4, alignment="left")
+        asyncio.create_task(self._telemetry.run())
 
         asyncio.create_task(self._display_controller.screensaver_drive())
-        asyncio.create_task(self._broadcast_uart_loop())
 
     async def _identify_flash(self) -> None:
         level = 255
@@ -120,6 +184,14 @@ class PicoBridge:
             timeout_char=20
         )
 
+        self._uart_tx.attach(
+            self._uart,
+            baudrate=settings.get('baudrate'),
+            bits=settings.get('bits'),
+            parity=settings.get('parity'),
+            stop=settings.get('stop')
+        )
+
     async def update_settings(self, new_settings: dict) -> None:
         must_save_config: bool = False
         must_restart: bool = False
@@ -305,142 +377,173 @@ class PicoBridge:
         if stop_flag is None:
             stop_flag = [False]
 
+        reader: UartReader = None
+
         while not stop_flag[0]:
-            had_data = False
+            # start_uart() may have replaced the UART (settings change)
+            if reader is None or reader.get_uart() is not self._uart:
+                reader = UartReader(self._uart, buffer_size=self._rx_buffer_size)
+
+            # view into the preallocated RX ring; no per-read allocation
+            data = await reader.read()
+            if not data:
+                continue
+
+            self._rx_bytes += len(data)
+
+            if self._uart_to_crlf:
+                data = bytes(data).replace(b'\n', b'\r\n')
+
+            self._scrollback.append(data)
+
+            self._led.on()
+            self._rx_activity = True
+            self._telemetry.notify()
+
+            # 1) hand IAC-escaped bytes to each TCP client's own send queue
+            if self.clients:
+                # one copy out of the RX ring shared by every client queue
+                telnet_data = telnet_escape(bytes(data))
+                for client in self.clients[:]:
+                    if not client.enqueue(telnet_data):
+                        self.clients.remove(client)
+
+            # 2) frame nicely for the WebSocket terminal
+            await self._terminal_output.feed(data)
+
+            self._led.off()
+
+    def add_client(self, writer, preamble: bytes = b'') -> TelnetClient:
+        """Register a telnet writer; preamble and the scrollback go out as its first write."""
+        client = TelnetClient(
+            writer,
+            max_queue_bytes=self._client_queue_bytes,
+            overflow=self._client_overflow,
+            coalesce_ms=self._client_coalesce_ms,
+            coalesce_bytes=self._client_coalesce_bytes
+        )
 
-            if self._uart.any():
-                data: bytes = self._uart.read(self._uart.any())
-                if data:
-                    had_data = True
-                    self._rx_bytes += len(data)
+        # no await between snapshot and registration, so no RX bytes are missed
+        client.enqueue(preamble + telnet_escape(self._scrollback.snapshot()))
+        client.start()
+        self.clients.append(client)
 
-                    if self._uart_to_crlf:
-                        data = data.replace(b'\n', b'\r\n')
+        return client
 
-                    self._led.on()
-                    self._rx_activity = True
+    def remove_client(self, client: TelnetClient) -> None:
+        client.close()
+        if client in self.clients:
+            self.clients.remove(client)
 
-                    # 1) forward raw bytes to TCP clients (unchanged behavior)
-                    for client in self.clients[:]:
-                        try:
-                            client.write(data)
-                            await client.drain()
+    def get_scrollback_frames(self) -> list[str]:
+        data = self._scrollback.snapshot()
 
-                        except:
-                            self.clients.remove(client)
+        # the oldest bytes may start in the middle of a UTF-8 sequence
+        start = 0
+        while start < 3 and start < len(data) and (data[start] & 0xC0) == 0x80:
+            start += 1
 
-                    # 2) frame nicely for the WebSocket terminal
-                    frames = self._terminal_framer.process_chunk(data)
-                    if frames:
-                        payloads = [json.dumps({"output": f}) for f in frames]
-                        await self._ws_manager.broadcast_payloads(payloads)
+        framer = self._new_framer()
+        frames = framer.process_chunk(memoryview(data)[start:])
 
-                    self._led.off()
+        return frames + framer.flush()
 
-            # If no new data, check idle flush to push prompts/partials
-            if not had_data:
-                frames = self._terminal_framer.flush_idle()
-                if frames:
-                    payloads = [json.dumps({"output": f}) for f in frames]
+    async def get_system_info(self) -> dict:
+        info = await self._system_monitor.get_dict()
+        info['telemetry'] = self._telemetry.get_stats()
 
-                    await self._ws_manager.broadcast_payloads(payloads)
+        return info
 
-                await asyncio.sleep(0.05)
+    def get_client_stats(self) -> list[dict]:
+        return [client.get_stats() for client in self.clients]
 
     async def client_to_uart(self, reader, writer, stop_flag: list[bool]) -> None:
+        parser = TelnetParser()
+
         try:
             while not stop_flag[0]:
                 buf = await reader.read(256)
                 if not buf:
                     break
 
-                if b'\xff' in buf:
-                    buf, reply = telnet_negotiation(buf)
-                    if reply:
-                        try:
-                            writer.write(reply)
-                            await writer.drain()
+                buf, reply = parser.feed(buf)
+                if reply:
+                    try:
+                        writer.write(reply)
+                        await writer.drain()
 
-                        except:
-                            pass
+                    except:
+                        pass
 
                 if not buf:
                     continue
 
                 self._tx_activity = True
+                self._telemetry.notify()
+                self._tx_bytes += len(buf)
 
-                for b in buf:
-                    self._tx_bytes += 1
-                    if b in (0x0A, 0x0D):
-                        if self._crlf_to_uart:
-                            self._uart.write(b'\r')
-                    else:
-                        self._uart.write(bytes([b]))
-                        await asyncio.sleep(0.005)
+                await self._uart_tx.write(translate_crlf(buf, self._crlf_to_uart))
 
         finally:
             stop_flag[0] = True
 
-    async def _broadcast_uart_loop(self) -> None:
-        while True:
-            if self._tx_activity or self._rx_activity:
-                data = {'tx': self._tx_activity, 'rx': self._rx_activity}
+    def _activity_part(self) -> dict:
+        data = {'tx': self._tx_activity, 'rx': self._rx_activity}
 
-                await self._ws_manager.broadcast_payloads(payloads=[json.dumps(data)])
+        self._tx_activity = False
+        self._rx_activity = False
 
-                self._tx_activity = False
-                self._rx_activity = False
+        return data
 
-            await asyncio.sleep(0.05)
-
-    async def _monitor_throughput(self) -> None:
-        await self._display_controller.set_line_alignment(line=3, alignment="left")
-        await self._display_controller.set_line_alignment(line=4, alignment="left")
+    async def _throughput_part(self) -> dict:
+        now = time.ticks_ms()
+        elapsed = time.ticks_diff(now, self._last_stats_time) / 1000
+        self._last_stats_time = now
 
-        while True:
-            await asyncio.sleep(1)
+        self._rx_rate = int(self._rx_bytes / elapsed) if elapsed else 0
+        self._tx_rate = int(self._tx_bytes / elapsed) if elapsed else 0
 
-            now = time.ticks_ms()
-            elapsed = time.ticks_diff(now, self._last_stats_time) / 1000
-            self._last_stats_time = now
+        self._rx_bytes = 0
+        self._tx_bytes = 0
 
-            self._rx_rate = int(self._rx_bytes / elapsed) if elapsed else 0
-            self._tx_rate = int(self._tx_bytes / elapsed) if elapsed else 0
+        activity: bool = bool(self._rx_rate or self._tx_rate)
 
-            self._rx_bytes = 0
-            self._tx_bytes = 0
+        if activity:
+            await self._display_controller.set_last_activity_time(value=now)
 
-            await self._ws_manager.broadcast_payloads(
-                payloads=[json.dumps({'rx_bps': self._rx_rate, 'tx_bps': self._tx_rate})]
-            )
-
-            activity: bool = bool(self._rx_rate or self._tx_rate)
-
-            if activity:
-                await self._display_controller.set_last_activity_time(value=now)
+        if self._display_controller.screensaver_is_active():
+            await self._display_controller.clear_line(line=3)
+            await self._display_controller.clear_line(line=4)
 
-            if self._display_controller.screensaver_is_active():
-                await self._display_controller.clear_line(line=3)
-                await self._display_controller.clear_line(line=4)
+        else:
+            await self._display_controller.write_to_line(line=3, text=f"RX: {self._rx_rate} b/s")
+            await self._display_controller.write_to_line(line=4, text=f"TX: {self._tx_rate} b/s")
 
-            else:
-                await self._display_controller.write_to_line(line=3, text=f"RX: {self._rx_rate} b/s")
-                await self._display_controller.write_to_line(line=4, text=f"TX: {self._tx_rate} b/s")
+        return {'rx_bps': self._rx_rate, 'tx_bps': self._tx_rate}
 
-    async def _monitor_system(self) -> None:
-        while True:
-            await asyncio.sleep(1)
+    def _system_part(self) -> dict:
+        return {
+            'mem_free': self._system_monitor.get_mem_free(),
+            'mem_alloc': self._system_monitor.get_mem_alloc(),
+            'ws_clients': self._ws_manager.get_client_count(),
+            'ws_reaped': self._ws_manager.get_reaped_count()
+        }
 
-            mem_free = self._system_monitor.get_mem_free()
-            mem_alloc = self._system_monitor.get_mem_alloc()
+    async def handle_websocket_input(self, data, ws=None):
+        """data is a complete JSON message (str), or raw input bytes from a MSG_INPUT fragment.
+        Returns a reply for the sending socket (ws), or None."""
+        paste = None
 
-            data = {'mem_free': mem_free, 'mem_alloc': mem_alloc}
+        try:
+            if not isinstance(data, str):
+                self._tx_activity = True
+                self._telemetry.notify()
+                self._tx_bytes += len(data)
 
-            await self._ws_manager.broadcast_payloads(payloads=[json.dumps(data)])
+                await self._uart_tx.write(translate_crlf(bytes(data), self._crlf_to_uart))
+                return
 
-    async def handle_websocket_input(self, raw_json: str) -> None:
-        try:
-            message = json.loads(raw_json)
+            message = json.loads(data)
 
             if 'input' in message:
                 command = message.get('input')
@@ -450,13 +553,61 @@ class PicoBridge:
                 encoded = command.encode('utf-8')
 
                 self._tx_activity = True
+                self._telemetry.notify()
                 self._tx_bytes += len(encoded)
 
-                self._uart.write(encoded)
+                await self._uart_tx.write(encoded)
+
+            elif 'paste' in message:
+                paste = message.get('paste')
+                return await self._handle_paste(paste)
+
+            elif 'subscribe' in message:
+                return {'subscribed': list(self._ws_manager.subscribe(ws, message.get('subscribe') or ()))}
 
         except Exception as e:
             self._logger.error(f"[WebSocket Input] {e}")
 
+            # the browser holds the next chunk until this one is acked
+            if paste is not None:
+                return self._paste_ack(paste, 0, 0, 'failed')
+
+    def reject_websocket_input(self, head: bytes) -> dict:
+        """Reply for a message dropped as too large, given its first bytes."""
+        # a paste chunk gets a failed ack, so the browser stops and says why
+        if head.startswith(b'{"paste"'):
+            return self._paste_ack(None, 0, 0, 'too large')
+
+        return {'error': 'message too large'}
+
+    @staticmethod
+    def _paste_ack(paste, lines: int, sent: int, error: str = None) -> dict:
+        if not isinstance(paste, dict):
+            paste = {}
+
+        ack = {'id': paste.get('id'), 'seq': paste.get('seq'), 'lines': lines, 'bytes': sent}
+        if error:
+            ack['error'] = error
+        else:
+            ack['done'] = bool(paste.get('last'))
+
+        return {'paste': ack}
+
+    async def _handle_paste(self, paste: dict) -> dict:
+        """Stream one chunk of a paste and acknowledge it; the browser sends the next chunk on the ack."""
+        mode = paste.get('mode') or self._paste_mode
+        if mode not in (PASTE_RATE, PASTE_PROMPT):
+            mode = self._paste_mode
+
+        self._tx_activity = True
+        self._telemetry.notify()
+        # only the last chunk may end in a line the browser didn't terminate
+        lines, sent, error = await self._paste.send(paste.get('data', ''), self._crlf_to_uart, mode,
+                                                    final=paste.get('last', True))
+        self._tx_bytes += sent
+
+        return self._paste_ack(paste, lines, sent, error)
+
     def enable_uart_to_crlf(self) -> None:
         self._uart_to_crlf = True
 
@@ -0,0 +1,81 @@
+class PromptMatcher:
+    """Aho-Corasick automaton over a set of prompt/pager tokens.
+
+    feed() is incremental: the automaton state carries over between calls,
+    so a token split across UART chunks is still found without rescanning
+    text that was already seen.
+    """
+    def __init__(self, tokens) -> None:
+        self._goto: list[dict] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list = [None]
+        self._state: int = 0
+
+        for tok in tokens:
+            if tok:
+                self._add(tok)
+
+        self._build()
+
+    def _add(self, tok: str) -> None:
+        state = 0
+        for ch in tok:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(None)
+
+            state = nxt
+
+        self._out[state] = tok
+
+    def _build(self) -> None:
+        queue = list(self._goto[0].values())
+        head = 0
+
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+
+                f = self._goto[f].get(ch, 0)
+                self._fail[nxt] = f if f != nxt else 0
+
+                # a state with no token of its own reports the longest token
+                # that is a suffix of it (reached through the fail link)
+                if self._out[nxt] is None:
+                    self._out[nxt] = self._out[self._fail[nxt]]
+
+    def reset(self) -> None:
+        self._state = 0
+
+    def feed(self, text: str, start: int = 0) -> tuple:
+        """Scan text[start:] and return (end index, token) of the first completed
+        token, or (-1, None). Matching restarts from scratch after a hit."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = self._state
+        i = start
+
+        # iterate rather than index: str indexing is O(n) on MicroPython
+        for ch in (text[start:] if start else text):
+            i += 1
+            while state and ch not in goto[state]:
+                state = fail[state]
+
+            state = goto[state].get(ch, 0)
+            if out[state] is not None:
+                self._state = 0
+                return i, out[state]
+
+        self._state = state
+
+        return -1, None
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """LRU cache of response bodies, bounded by total bytes.
+
+    Each entry is stored with a validator (a version, a content hash); a get()
+    with a different validator is a miss and drops the stale entry. Bodies
+    larger than max_entry_bytes are never cached.
+    """
+    def __init__(self, max_bytes: int = 24576, max_entry_bytes: int = 8192) -> None:
+        self._max_bytes: int = max_bytes
+        self._max_entry_bytes: int = max_entry_bytes
+        # key -> (validator, body), least recently used first
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes: int = 0
+        self._hits: int = 0
+        self._misses: int = 0
+        self._evictions: int = 0
+
+    def fits(self, size: int) -> bool:
+        return size <= self._max_entry_bytes and size <= self._max_bytes
+
+    def get(self, key, validator):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        if entry[0] != validator:
+            self._bytes -= len(entry[1])
+            self._misses += 1
+            return None
+
+        # re-inserting moves it to the most recently used end
+        self._entries[key] = entry
+        self._hits += 1
+
+        return entry[1]
+
+    def put(self, key, validator, body: bytes) -> bytes:
+        """Store body (if it fits) and return it."""
+        if not self.fits(len(body)):
+            return body
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old[1])
+
+        while self._entries and self._bytes + len(body) > self._max_bytes:
+            # popitem(last=False) isn't available on MicroPython
+            _, evicted = self._entries.pop(next(iter(self._entries)))
+            self._bytes -= len(evicted)
+            self._evictions += 1
+
+        self._entries[key] = (validator, body)
+        self._bytes += len(body)
+
+        return body
+
+    def get_stats(self) -> dict:
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self._max_bytes,
+            'hits': self._hits,
+            'misses': self._misses,
+            'evictions': self._evictions
+        }
@@ -0,0 +1,40 @@
+class Scrollback:
+    def __init__(self, size: int = 4096) -> None:
+        self._size: int = size
+        self._buf: bytearray = bytearray(size)
+        self._mv: memoryview = memoryview(self._buf)
+        self._head: int = 0
+        self._used: int = 0
+
+    def get_size(self) -> int:
+        return self._size
+
+    def append(self, data) -> None:
+        """Copy data (bytes or memoryview) into the ring, overwriting the oldest bytes."""
+        size = self._size
+        n = len(data)
+        if not size or not n:
+            return
+
+        if n >= size:
+            self._mv[:] = data[n - size:]
+            self._head = 0
+            self._used = size
+            return
+
+        first = size - self._head
+        if n <= first:
+            self._mv[self._head:self._head + n] = data
+        else:
+            self._mv[self._head:] = data[:first]
+            self._mv[:n - first] = data[first:]
+
+        self._head = (self._head + n) % size
+        self._used = min(size, self._used + n)
+
+    def snapshot(self) -> bytes:
+        """Oldest-to-newest contents as one bytes object."""
+        if self._used < self._size:
+            return bytes(self._mv[:self._used])
+
+        return bytes(self._mv[self._head:]) + bytes(self._mv[:self._head])
@@ -0,0 +1,206 @@
+import binascii
+import hashlib
+import os
+
+try:
+    import deflate
+except ImportError:
+    deflate = None
+
+try:
+    import zlib
+except ImportError:
+    zlib = None
+
+from libraries.microdot.microdot import Response, send_file
+from src.logger import Logger
+
+
+def _stat(filename: str):
+    try:
+        st = os.stat(filename)
+
+    except OSError:
+        return None
+
+    return st[6], st[8]
+
+
+def _chunks(f, size: int = 1024):
+    buf = bytearray(size)
+    mv = memoryview(buf)
+    while True:
+        n = f.readinto(buf)
+        if not n:
+            return
+        yield mv[:n]
+
+
+def _gunzip_chunks(f):
+    if deflate is not None:
+        yield from _chunks(deflate.DeflateIO(f, deflate.GZIP))
+    else:
+        d = zlib.decompressobj(31)
+        for chunk in _chunks(f):
+            yield d.decompress(chunk)
+        yield d.flush()
+
+
+def _digest(chunks) -> str:
+    h = hashlib.sha256()
+    for chunk in chunks:
+        h.update(chunk)
+
+    return binascii.hexlify(h.digest()[:8]).decode()
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    for part in accept_encoding.split(','):
+        name, _, params = part.partition(';')
+        if name.strip() == 'gzip':
+            return params.replace(' ', '') not in ('q=0', 'q=0.0')
+
+    return False
+
+
+def _content_type(filename: str) -> str:
+    return Response.types_map.get(filename.split('.')[-1], 'application/octet-stream')
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*' or tag == etag or tag == 'W/' + etag:
+            return True
+
+    return False
+
+
+class StaticFiles:
+    """Serves a folder with content-hash ETags and precompressed .gz siblings.
+
+    Pages link assets through url(), which appends ?v=<hash>. A request that
+    carries the current hash is cacheable for hashed_max_age; any other one
+    gets max_age and is revalidated, answered with 304 while the ETag holds.
+    With a ResponseCache, small files are served from RAM instead of flash.
+    """
+    def __init__(self, folder: str, url_prefix: str = '/static/',
+                 hashed_max_age: int = 31536000, max_age: int = 0, cache=None) -> None:
+        self._folder: str = folder
+        self._cache = cache
+        self._url_prefix: str = url_prefix
+        self._hashed_max_age: int = hashed_max_age
+        self._max_age: int = max_age
+        # filename -> ((size, mtime), hash, (size, mtime) of the .gz sibling or
+        # None, size of the .gz if it is served or None)
+        self._entries: dict = {}
+        self._sent: int = 0
+        self._sent_gzip: int = 0
+        self._not_modified: int = 0
+        self._logger: Logger = Logger("StaticFiles")
+
+    def _entry(self, filename: str):
+        st = _stat(filename)
+        if st is None:
+            self._entries.pop(filename, None)
+            return None
+
+        gz_st = _stat(filename + '.gz')
+        entry = self._entries.get(filename)
+        if entry and entry[0] == st and entry[2] == gz_st:
+            return entry
+
+        with open(filename, 'rb') as f:
+            digest = _digest(_chunks(f))
+
+        gz_size = None
+        if gz_st is not None:
+            # a .gz left behind when its source was edited must not be served
+            # under the new hash: it has to decompress to the same content
+            if deflate is not None or hasattr(zlib, 'decompressobj'):
+                try:
+                    with open(filename + '.gz', 'rb') as f:
+                        fresh = _digest(_gunzip_chunks(f)) == digest
+
+                except Exception:
+                    fresh = False
+            else:
+                fresh = gz_st[1] >= st[1]
+
+            if fresh:
+                gz_size = gz_st[0]
+            else:
+                self._logger.info(f"Ignoring stale {filename}.gz")
+
+        entry = (st, digest, gz_st, gz_size)
+        self._entries[filename] = entry
+
+        return entry
+
+    def url(self, path: str) -> str:
+        """URL for path with its content hash, for templates to link."""
+        entry = self._entry(self._folder + path)
+        if entry is None:
+            return self._url_prefix + path
+
+        return f"{self._url_prefix}{path}?v={entry[1]}"
+
+    def get_stats(self) -> dict:
+        return {
+            'files': len(self._entries),
+            'sent': self._sent,
+            'sent_gzip': self._sent_gzip,
+            'not_modified': self._not_modified
+        }
+
+    def response(self, req, path: str):
+        if '..' in path:
+            return 'Not found', 404
+
+        filename = self._folder + path
+        entry = self._entry(filename)
+        if entry is None:
+            return 'Not found', 404
+
+        (size, _), digest, _, gz_size = entry
+        has_gz = gz_size is not None
+        gzip = has_gz and _accepts_gzip(req.headers.get('Accept-Encoding', ''))
+
+        # the encodings differ byte for byte, so they need different tags
+        etag = f'"{digest}-gz"' if gzip else f'"{digest}"'
+
+        if req.args.get('v') == digest:
+            cache_control = f"max-age={self._hashed_max_age}, immutable"
+        else:
+            cache_control = f"max-age={self._max_age}"
+
+        headers = {'ETag': etag, 'Cache-Control': cache_control}
+        if has_gz:
+            headers['Vary'] = 'Accept-Encoding'
+
+        if _etag_matches(req.headers.get('If-None-Match', ''), etag):
+            self._not_modified += 1
+            return Response(body=b'', status_code=304, headers=headers)
+
+        self._sent += 1
+        if gzip:
+            self._sent_gzip += 1
+            size = gz_size
+
+        if self._cache is not None and self._cache.fits(size):
+            path = filename + '.gz' if gzip else filename
+            body = self._cache.get(path, digest)
+            if body is None:
+                with open(path, 'rb') as f:
+                    body = self._cache.put(path, digest, f.read())
+
+            headers['Content-Type'] = _content_type(filename)
+            if gzip:
+                headers['Content-Encoding'] = 'gzip'
+
+            return Response(body=body, headers=headers)
+
+        res = send_file(filename, compressed=gzip, file_extension='.gz' if gzip else '')
+        res.headers.update(headers)
+
+        return res
@@ -13,6 +13,7 @@ class SystemMonitor:
         self._errors_qty: int = 0
         self._errors_max_qty: int = errors_max_qty
         self._start_date: str = ''
+        self._buffers: dict = {}
 
     async def start(self) -> None:
         asyncio.create_task(self._update_memory())
@@ -28,9 +29,21 @@ class SystemMonitor:
             "gc_timer": self._gc_timer,
             "errors_qty": self._errors_qty,
             "errors_max_qty": self._errors_max_qty,
-            "start_date": self._start_date
+            "start_date": self._start_date,
+            "buffers": self.get_buffers(),
+            "buffers_total": self.get_buffers_total()
         }
 
+    def register_buffer(self, name: str, size: int) -> None:
+        """Record a long-lived preallocated buffer so its RAM cost is reported."""
+        self._buffers[name] = size
+
+    def get_buffers(self) -> dict:
+        return self._buffers.copy()
+
+    def get_buffers_total(self) -> int:
+        return sum(self._buffers.values())
+
     def get_mem_low_value(self) -> int:
         return self._mem_low_value
 
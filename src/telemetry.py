@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+from src.ws_protocol import TOPIC_ACTIVITY, TOPIC_SYSTEM, TOPIC_THROUGHPUT
+
+
+class TelemetryScheduler:
+    """One task for all WebSocket telemetry.
+
+    throughput() runs every throughput_ms whether or not anyone listens (it
+    also drives the display); system() runs every system_ms only while the
+    topic has subscribers. activity() is event driven: notify() wakes the
+    task, at most once per activity_ms, and only while someone subscribes.
+    Whatever is due at a wakeup goes out as a single combined message.
+    """
+    def __init__(self, ws_manager, activity, throughput, system,
+                 activity_ms: int = 50, throughput_ms: int = 1000, system_ms: int = 1000) -> None:
+        self._ws_manager = ws_manager
+        self._activity = activity
+        self._throughput = throughput
+        self._system = system
+        self._activity_ms: int = activity_ms
+        self._throughput_ms: int = throughput_ms
+        self._system_ms: int = system_ms
+
+        self._wake: asyncio.Event = asyncio.Event()
+        self._wakeups: int = 0
+        self._messages: int = 0
+        self._started_ms: int = time.ticks_ms()
+
+    def notify(self) -> None:
+        """Something happened that activity() will report."""
+        if not self._wake.is_set() and self._ws_manager.has_subscribers(TOPIC_ACTIVITY):
+            self._wake.set()
+
+    def get_stats(self) -> dict:
+        elapsed = time.ticks_diff(time.ticks_ms(), self._started_ms) / 1000
+
+        return {
+            'wakeups': self._wakeups,
+            'messages': self._messages,
+            'wakeups_per_s': round(self._wakeups / elapsed, 2) if elapsed else 0
+        }
+
+    def _until_periodic(self, now: int, last_rates: int, last_system: int) -> int:
+        return min(self._throughput_ms - time.ticks_diff(now, last_rates),
+                   self._system_ms - time.ticks_diff(now, last_system))
+
+    async def run(self) -> None:
+        self._started_ms = now = time.ticks_ms()
+        last_rates = last_system = now
+        last_activity = None
+
+        while True:
+            # sleep until the next periodic job or until notify(); pending
+            # activity is then held until activity_ms after the last report
+            now = time.ticks_ms()
+            wait = self._until_periodic(now, last_rates, last_system)
+
+            if not self._wake.is_set() and wait > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), wait / 1000)
+
+                except asyncio.TimeoutError:
+                    pass
+
+                now = time.ticks_ms()
+                wait = self._until_periodic(now, last_rates, last_system)
+
+            if self._wake.is_set() and last_activity is not None:
+                wait = min(wait, self._activity_ms - time.ticks_diff(now, last_activity))
+                if wait > 0:
+                    await asyncio.sleep(wait / 1000)
+
+            self._wakeups += 1
+            now = time.ticks_ms()
+            parts = {}
+
+            if self._wake.is_set() and (last_activity is None or
+                                        time.ticks_diff(now, last_activity) >= self._activity_ms):
+                self._wake.clear()
+                last_activity = now
+                part = self._activity()
+                if part:
+                    parts[TOPIC_ACTIVITY] = part
+
+            if time.ticks_diff(now, last_rates) >= self._throughput_ms:
+                last_rates = now
+                part = await self._throughput()
+                if self._ws_manager.has_subscribers(TOPIC_THROUGHPUT):
+                    parts[TOPIC_THROUGHPUT] = part
+
+            if time.ticks_diff(now, last_system) >= self._system_ms:
+                last_system = now
+                if self._ws_manager.has_subscribers(TOPIC_SYSTEM):
+                    parts[TOPIC_SYSTEM] = self._system()
+
+            if parts:
+                self._messages += 1
+                await self._ws_manager.broadcast_parts(parts)
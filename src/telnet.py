@@ -9,45 +9,81 @@ TELNET_INIT: bytes = bytes([
     IAC, SB, 34, 1, 0, IAC, SE  # SB LINEMODE MODE 0
 ])
 
+IAC_BYTE: bytes = b'\xff'
 
-def telnet_negotiation(buf: bytes) -> tuple[bytes, bytes]:
-    out, resp = bytearray(), bytearray()
-    i, n = 0, len(buf)
+# TelnetParser states
+_DATA, _IAC, _OPT, _SB, _SB_IAC = 0, 1, 2, 3, 4
 
-    while i < n:
-        b = buf[i]
-        if b != IAC:
-            out.append(b)
-            i += 1
-            continue
 
-        if i + 1 >= n:
-            break
+class TelnetParser:
+    """Streaming telnet input parser; keeps state so sequences may straddle reads."""
+    def __init__(self) -> None:
+        self._state: int = _DATA
+        self._cmd: int = 0
 
-        cmd = buf[i + 1]
-        if cmd in (DO, DONT, WILL, WONT):
-            if i + 2 >= n:
-                break
+    def feed(self, buf: bytes) -> tuple[bytes, bytes]:
+        """Returns (data for the UART, negotiation reply for the client)."""
+        # Fast path: plain data, no command in flight
+        if self._state == _DATA and buf.find(IAC_BYTE) == -1:
+            return buf, b''
 
-            opt = buf[i + 2]
-            if cmd == DO:
-                resp += bytes([IAC, WONT, opt])
-            elif cmd == WILL:
-                resp += bytes([IAC, DONT, opt])
+        out, resp = bytearray(), bytearray()
+        i, n = 0, len(buf)
 
-            i += 3
+        while i < n:
+            state = self._state
 
-        elif cmd == SB:
-            i += 2
-            while i < n - 1 and not (buf[i] == IAC and buf[i + 1] == SE):
+            if state == _DATA:
+                j = buf.find(IAC_BYTE, i)
+                if j == -1:
+                    out += buf[i:]
+                    break
+
+                out += buf[i:j]
+                i = j + 1
+                self._state = _IAC
+
+            elif state == _IAC:
+                cmd = buf[i]
+                i += 1
+                if cmd in (DO, DONT, WILL, WONT):
+                    self._cmd = cmd
+                    self._state = _OPT
+                elif cmd == SB:
+                    self._state = _SB
+                else:
+                    if cmd == IAC:
+                        out.append(IAC)
+                    self._state = _DATA
+
+            elif state == _OPT:
+                opt = buf[i]
+                i += 1
+                if self._cmd == DO:
+                    resp += bytes([IAC, WONT, opt])
+                elif self._cmd == WILL:
+                    resp += bytes([IAC, DONT, opt])
+                self._state = _DATA
+
+            elif state == _SB:
+                j = buf.find(IAC_BYTE, i)
+                if j == -1:
+                    break
+
+                i = j + 1
+                self._state = _SB_IAC
+
+            else:  # _SB_IAC
+                self._state = _DATA if buf[i] == SE else _SB
                 i += 1
 
-            i += 2 if i < n - 1 else 0
+        return bytes(out), bytes(resp)
+
+
+def telnet_escape(data: bytes) -> bytes:
+    """Double IAC bytes in outbound data; returns data itself when there are none."""
+    if data.find(IAC_BYTE) == -1:
+        return data
 
-        elif cmd == IAC:
-            out.append(IAC)
-            i += 2
-        else:
-            i += 2
+    return data.replace(IAC_BYTE, IAC_BYTE + IAC_BYTE)
 
-    return bytes(out), bytes(resp)
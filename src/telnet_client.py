@@ -0,0 +1,114 @@
+import asyncio
+
+from src.logger import Logger
+
+OVERFLOW_DROP: str = 'drop'
+OVERFLOW_DISCONNECT: str = 'disconnect'
+
+
+class TelnetClient:
+    def __init__(self, writer, max_queue_bytes: int = 8192, overflow: str = OVERFLOW_DROP,
+                 coalesce_ms: int = 5, coalesce_bytes: int = 512) -> None:
+        self._writer = writer
+        self._max_queue_bytes: int = max_queue_bytes
+        self._overflow: str = overflow
+        self._coalesce_ms: int = coalesce_ms
+        self._coalesce_bytes: int = coalesce_bytes
+        self._logger: Logger = Logger("TelnetClient")
+
+        self._queue: list = []
+        self._depth: int = 0
+        self._ready: asyncio.Event = asyncio.Event()
+        self._full: asyncio.Event = asyncio.Event()
+        self._closed: bool = False
+        self._task = None
+
+        self._queued_bytes: int = 0
+        self._sent_bytes: int = 0
+        self._dropped_bytes: int = 0
+        self._writes: int = 0
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def enqueue(self, data) -> bool:
+        """Queue data for this client without waiting on its socket. Returns False once closed."""
+        if self._closed:
+            return False
+
+        n = len(data)
+        if self._depth + n > self._max_queue_bytes:
+            if self._overflow == OVERFLOW_DISCONNECT:
+                self._logger.info(f"Client queue overflow ({self._depth} B queued), disconnecting")
+                self.close()
+                return False
+
+            self._dropped_bytes += n
+            return True
+
+        # data may be a view into the RX ring, which will be reused
+        self._queue.append(data if isinstance(data, bytes) else bytes(data))
+        self._depth += n
+        self._queued_bytes += n
+        self._ready.set()
+        if self._depth >= self._coalesce_bytes:
+            self._full.set()
+
+        return True
+
+    def close(self) -> None:
+        if self._closed:
+            return
+
+        self._closed = True
+        self._ready.set()
+        self._full.set()
+
+        try:
+            self._writer.close()
+
+        except Exception:
+            pass
+
+    def get_stats(self) -> dict:
+        return {
+            'queued': self._queued_bytes,
+            'sent': self._sent_bytes,
+            'dropped': self._dropped_bytes,
+            'depth': self._depth,
+            'writes': self._writes
+        }
+
+    async def _run(self) -> None:
+        try:
+            while not self._closed:
+                await self._ready.wait()
+                self._ready.clear()
+
+                # Hold small writes for up to coalesce_ms (or until
+                # coalesce_bytes are queued) so a burst of small UART reads
+                # becomes one TCP segment instead of many.
+                if self._coalesce_ms and self._depth < self._coalesce_bytes:
+                    self._full.clear()
+                    try:
+                        await asyncio.wait_for(self._full.wait(), self._coalesce_ms / 1000)
+
+                    except asyncio.TimeoutError:
+                        pass
+
+                while self._queue and not self._closed:
+                    # coalesce whatever piled up while the last drain was pending
+                    chunks = self._queue
+                    self._queue = []
+                    data = chunks[0] if len(chunks) == 1 else b''.join(chunks)
+
+                    self._writer.write(data)
+                    await self._writer.drain()
+
+                    self._depth -= len(data)
+                    self._sent_bytes += len(data)
+                    self._writes += 1
+
+        except Exception as e:
+            self._logger.info(f"Client send failed: {e}")
+            self.close()
@@ -1,5 +1,9 @@
 import time
 
+from src.prompt_matcher import PromptMatcher
+
+DEFAULT_FLUSH_TOKENS: tuple = ('Username:', 'Password:', 'login:', '--More--')
+
 
 def apply_backspaces(s: str) -> str:
     out = []
@@ -20,18 +24,24 @@ def normalize_newlines(s: str) -> str:
 
 
 class TerminalFramer:
-    def __init__(self, idle_flush_ms: int = 150, flush_tokens = None) -> None:
+    def __init__(self, idle_flush_ms: int = 150, flush_tokens = None, on_prompt = None) -> None:
         self._utf8_tail: bytes = b''
-        self._line_accum: str = ''
         self._last_rx_ms = time.ticks_ms()
         self._idle_flush_ms = idle_flush_ms
-        self._flush_tokens = flush_tokens or ('Username:', 'Password:', 'login:', '--More--')
-
-
-    def _utf8_feed(self, chunk: bytes) -> str:
-        b = self._utf8_tail + chunk
+        self._matcher: PromptMatcher = PromptMatcher(flush_tokens or DEFAULT_FLUSH_TOKENS)
+        # called whenever a prompt goes out: a token hit or an idle partial line
+        self._on_prompt = on_prompt
+
+        # Partial (unterminated) line, kept as a list of parts so a long line
+        # arriving over many chunks is joined once, not re-copied per chunk.
+        self._parts: list[str] = []
+
+    def _utf8_feed(self, chunk) -> str:
+        # chunk may be a memoryview into the RX ring: decode it in place and
+        # copy only the (at most 3 byte) incomplete tail we have to keep.
+        b = self._utf8_tail + chunk if self._utf8_tail else chunk
         try:
-            s = b.decode()
+            s = str(b, 'utf-8')
             self._utf8_tail = b''
 
             return s
@@ -40,66 +50,78 @@ class TerminalFramer:
             for keep in (1, 2, 3):
                 if len(b) > keep:
                     try:
-                        s = b[:-keep].decode()
-                        self._utf8_tail = b[-keep:]
+                        s = str(b[:-keep], 'utf-8')
+                        self._utf8_tail = bytes(b[-keep:])
                         return s
                     except Exception:
                         pass
 
-            self._utf8_tail = b
+            self._utf8_tail = bytes(b)
 
             return ''
 
-    def _split_on_pager_or_prompt(self, text: str) -> tuple:
-        first_idx = -1
-        first_tok = None
-        for tok in self._flush_tokens:
-            idx = text.find(tok)
-            if idx != -1 and (first_idx == -1 or idx < first_idx):
-                first_idx = idx
-                first_tok = tok
-
-        if first_idx == -1:
-            return text, None, ''
+    def _take_partial(self) -> str:
+        partial = self._parts[0] if len(self._parts) == 1 else ''.join(self._parts)
+        self._parts = []
+        # a token can't straddle text that has already been emitted
+        self._matcher.reset()
 
-        prefix = text[:first_idx]
-        suffix = text[first_idx + len(first_tok):]
-
-        return prefix, first_tok, suffix
+        return partial
 
     def _frames_from_text(self, s: str) -> list[str]:
         frames: list[str] = []
         s = apply_backspaces(s)
         s = normalize_newlines(s)
 
-        self._line_accum += s
-
-        while True:
-            nl = self._line_accum.find('\n')
-            if nl == -1:
-                break
-            line = self._line_accum[:nl + 1]
-            frames.append(line)
-            self._line_accum = self._line_accum[nl + 1:]
+        # Complete lines: one forward scan with index offsets, no re-slicing
+        # of what is left over.
+        start = 0
+        nl = s.find('\n')
+        while nl != -1:
+            if self._parts:
+                self._parts.append(s[start:nl + 1])
+                frames.append(self._take_partial())
+            else:
+                frames.append(s[start:nl + 1])
+
+            start = nl + 1
+            nl = s.find('\n', start)
+
+        if start == len(s):
+            return frames
+
+        rest = s[start:] if start else s
+
+        # Pager/prompt tokens can only sit in the partial line. The matcher
+        # carries its state across chunks, so only the new text is scanned.
+        end, tok = self._matcher.feed(rest)
+        if tok is None:
+            self._parts.append(rest)
+            return frames
+
+        text = self._take_partial() + rest if self._parts else rest
+        offset = len(text) - len(rest)
+        pos = 0
+
+        while tok is not None:
+            idx = offset + end - len(tok)
+            if idx > pos:
+                frames.append(text[pos:idx] + '\n')
 
-        while True:
-            if not self._line_accum:
-                break
+            frames.append(tok + '\n')
+            pos = idx + len(tok)
+            end, tok = self._matcher.feed(rest, end)
 
-            before, tok, after = self._split_on_pager_or_prompt(self._line_accum)
-            if tok is None:
-                break
+        if pos < len(text):
+            self._parts.append(text[pos:])
 
-            if before:
-                frames.append(before + ('\n' if not before.endswith('\n') else ''))
-
-            frames.append(tok + '\n')
-            self._line_accum = after
+        if self._on_prompt:
+            self._on_prompt()
 
         return frames
 
-    def process_chunk(self, chunk: bytes) -> list[str]:
-        """Feed a raw UART chunk, returns list of frames (strings)."""
+    def process_chunk(self, chunk) -> list[str]:
+        """Feed a raw UART chunk (bytes or memoryview), returns list of frames (strings)."""
         self._last_rx_ms = time.ticks_ms()
         decoded = self._utf8_feed(chunk)
         if not decoded:
@@ -107,12 +129,29 @@ class TerminalFramer:
 
         return self._frames_from_text(decoded)
 
+    def get_idle_flush_ms(self) -> int:
+        return self._idle_flush_ms
+
+    def has_partial(self) -> bool:
+        return bool(self._parts)
+
+    def get_partial(self) -> str:
+        return ''.join(self._parts)
+
     def flush_idle(self) -> list[str]:
         """If idle and partial exists, emit it (to avoid stuck prompts)."""
         now = time.ticks_ms()
-        if self._line_accum and time.ticks_diff(now, self._last_rx_ms) >= self._idle_flush_ms:
-            frame = self._line_accum
-            self._line_accum = ''
-            return [frame]
+        if self._parts and time.ticks_diff(now, self._last_rx_ms) >= self._idle_flush_ms:
+            if self._on_prompt:
+                self._on_prompt()
+
+            return [self._take_partial()]
 
         return []
+
+    def flush(self) -> list[str]:
+        """Emit any partial line right away, regardless of idle time."""
+        if not self._parts:
+            return []
+
+        return [self._take_partial()]
@@ -0,0 +1,45 @@
+import asyncio
+
+from src.terminal_framer import TerminalFramer
+from src.ws_protocol import TOPIC_OUTPUT
+
+
+class TerminalOutput:
+    """Carries UART RX to the WebSocket terminal.
+
+    feed() frames one RX read and sends everything it produced as a single
+    'output' message. A partial line (usually a prompt) left behind is pushed
+    by run() once RX has been quiet for the framer's idle window.
+    """
+    def __init__(self, framer: TerminalFramer, ws_manager) -> None:
+        self._framer: TerminalFramer = framer
+        self._ws_manager = ws_manager
+        self._pending: asyncio.Event = asyncio.Event()
+
+    async def feed(self, data) -> None:
+        frames = self._framer.process_chunk(data)
+        if frames:
+            await self._broadcast(frames)
+
+        if self._framer.has_partial():
+            self._pending.set()
+
+    async def _broadcast(self, frames: list[str]) -> None:
+        """One encode and one WebSocket message for all frames of an RX read."""
+        await self._ws_manager.broadcast({'output': frames}, TOPIC_OUTPUT)
+
+    async def run(self) -> None:
+        idle_flush_ms: int = self._framer.get_idle_flush_ms()
+
+        while True:
+            await self._pending.wait()
+            self._pending.clear()
+
+            await asyncio.sleep_ms(idle_flush_ms)
+
+            frames = self._framer.flush_idle()
+            if frames:
+                await self._broadcast(frames)
+
+            elif self._framer.has_partial():
+                self._pending.set()
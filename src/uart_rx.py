@@ -0,0 +1,40 @@
+import asyncio
+
+
+class UartReader:
+    def __init__(self, uart, buffer_size: int = 512, stream=None) -> None:
+        self._uart = uart
+        self._stream = stream if stream is not None else asyncio.StreamReader(uart)
+
+        # Preallocated RX ring; read() hands out views into it. A view stays
+        # valid until the ring laps around to it again.
+        self._size: int = max(16, buffer_size)
+        self._buf: bytearray = bytearray(self._size)
+        self._mv: memoryview = memoryview(self._buf)
+        self._head: int = 0
+
+    def get_uart(self):
+        return self._uart
+
+    async def read(self) -> memoryview:
+        """Suspend until the UART has bytes pending, then readinto the ring and return a view."""
+        while True:
+            n = self._uart.any()
+            if n:
+                # wrap early rather than return a sliver at the end of the ring
+                if self._size - self._head < n:
+                    self._head = 0
+
+                if n > self._size:
+                    n = self._size
+
+                start = self._head
+                got = self._uart.readinto(self._mv[start:start + n])
+                if got:
+                    self._head = start + got
+                    return self._mv[start:start + got]
+
+            # A zero-length read parks the task on the asyncio poller until
+            # the UART reports readable, without consuming (or blocking on)
+            # any bytes; the actual read above never waits on timeout_char.
+            await self._stream.read(0)
@@ -0,0 +1,81 @@
+import asyncio
+
+CR: int = 0x0D
+LF: int = 0x0A
+
+# RP2040/RP2350 PL011 hardware TX FIFO depth
+UART_FIFO_SIZE: int = 32
+
+
+def frame_bits(bits: int = 8, parity=None, stop: int = 1) -> int:
+    """Bits on the wire per character: start + data + parity + stop."""
+    return 1 + bits + (0 if parity is None else 1) + stop
+
+
+def char_time_us(baudrate: int, bits: int = 8, parity=None, stop: int = 1) -> int:
+    # round up so pacing never runs ahead of the wire
+    return -(-frame_bits(bits, parity, stop) * 1_000_000 // baudrate)
+
+
+def translate_crlf(buf: bytes, crlf_to_uart: bool) -> bytes:
+    """Bulk equivalent of the old per-byte loop: CR/LF become CR, or are dropped."""
+    if crlf_to_uart:
+        return buf.replace(b'\n', b'\r')
+
+    return buf.replace(b'\r', b'').replace(b'\n', b'')
+
+
+class UartTx:
+    def __init__(self, inter_char_ms: int = 0, inter_line_ms: int = 0, chunk_size: int = UART_FIFO_SIZE) -> None:
+        self._uart = None
+        self._char_us: int = char_time_us(9600)
+        self._inter_char_ms: int = inter_char_ms
+        self._inter_line_ms: int = inter_line_ms
+        self._chunk_size: int = max(1, chunk_size)
+
+    def attach(self, uart, baudrate: int, bits: int = 8, parity=None, stop: int = 1) -> None:
+        self._uart = uart
+        self._char_us = char_time_us(baudrate, bits, parity, stop)
+
+    async def write(self, buf: bytes) -> int:
+        """Write buf to the UART in FIFO-sized chunks, paced to the line rate."""
+        n = len(buf)
+        if not n or self._uart is None:
+            return 0
+
+        mv = memoryview(buf)
+        chunk = 1 if self._inter_char_ms else self._chunk_size
+        per_char_us = self._char_us + self._inter_char_ms * 1000
+        i = 0
+        debt_us = 0
+
+        while i < n:
+            end = i + chunk
+            if end > n:
+                end = n
+
+            line_end = False
+            if self._inter_line_ms:
+                cr = buf.find(b'\r', i, end)
+                if cr != -1:
+                    end = cr + 1
+                    line_end = True
+
+            self._uart.write(mv[i:end])
+
+            debt_us += (end - i) * per_char_us
+            if line_end:
+                debt_us += self._inter_line_ms * 1000
+
+            i = end
+
+            # Sleep whole milliseconds only and carry the remainder, so the
+            # average rate tracks the baudrate instead of the ms tick.
+            ms = debt_us // 1000
+            if ms:
+                debt_us -= ms * 1000
+                await asyncio.sleep(ms / 1000)
+            else:
+                await asyncio.sleep(0)
+
+        return n
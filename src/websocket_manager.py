@@ -1,45 +1,253 @@
+import asyncio
+
+from libraries.microdot.websocket import WebSocket
 from src.logger import Logger
+from src.ws_protocol import BINARY_SUBPROTOCOL, TOPICS, encode_binary, encode_json
+
+
+class _Outbound:
+    def __init__(self, ws) -> None:
+        self.ws = ws
+        self.frames: list = []
+        self.depth: int = 0
+        self.sent_frames: int = 0
+        self.sent_bytes: int = 0
+        self.ready: asyncio.Event = asyncio.Event()
+        self.closed: bool = False
+        self.binary: bool = getattr(ws, 'subprotocol', None) == BINARY_SUBPROTOCOL
+        self.deflate_wbits: int = getattr(ws, 'deflate_wbits', 0)
+        # frames are shared between sockets that negotiated the same encoding
+        self.encoding: tuple = (self.binary, self.deflate_wbits)
+        self.topics: tuple = TOPICS
+        # input messages being handled; the handler reads no frames meanwhile
+        self.handling: int = 0
 
 
 class WebsocketManager:
-    def __init__(self) -> None:
-        self._websockets: list = []
+    def __init__(self, max_queue_bytes: int = 16384, ping_interval_s: int = 20, ping_timeout_s: int = 10) -> None:
+        # ws -> _Outbound; each registered socket has its own queue and sender task
+        self._websockets: dict = {}
+        self._max_queue_bytes: int = max_queue_bytes
+        self._ping_interval_s: int = ping_interval_s
+        self._ping_timeout_s: int = ping_timeout_s
+        self._ping_frame = WebSocket.encode_frame(b'', WebSocket.PING)
+        self._pings: int = 0
+        self._reaped: int = 0
+        # topic -> number of subscribed sockets, so producers can skip work
+        self._subscribers: dict = {topic: 0 for topic in TOPICS}
         self._logger: Logger = Logger("WebSocketManager")
 
+    def start(self) -> None:
+        if self._ping_interval_s > 0:
+            asyncio.create_task(self._keepalive())
+
     def register(self, ws) -> None:
         if ws not in self._websockets:
-            self._websockets.append(ws)
+            out = _Outbound(ws)
+            self._websockets[ws] = out
+            self._count_topics(out.topics, 1)
+            asyncio.create_task(self._sender(out))
 
     def unregister(self, ws) -> None:
         try:
-            if ws in self._websockets:
-                self._websockets.remove(ws)
+            out = self._websockets.pop(ws, None)
+            if out:
+                self._count_topics(out.topics, -1)
+                out.closed = True
+                out.ready.set()
 
         except Exception as e:
             if self._logger:
                 self._logger.info(f"Error removing websocket: {e}")
 
-    async def _safe_send(self, ws, payload: str) -> bool:
+    def _count_topics(self, topics: tuple, delta: int) -> None:
+        for topic in topics:
+            self._subscribers[topic] += delta
+
+    def subscribe(self, ws, topics) -> tuple:
+        """Replace the topics a socket receives; unknown names are ignored. Returns the new set."""
+        out = self._websockets.get(ws)
+        if not out:
+            return ()
+
+        topics = tuple(t for t in TOPICS if t in topics)
+        self._count_topics(out.topics, -1)
+        out.topics = topics
+        self._count_topics(topics, 1)
+
+        return topics
+
+    def has_subscribers(self, topic: str) -> bool:
+        return self._subscribers.get(topic, 0) > 0
+
+    def begin_input(self, ws) -> None:
+        """The handler is busy with a message from ws and won't read its pongs until end_input()."""
+        out = self._websockets.get(ws)
+        if out:
+            out.handling += 1
+
+    def end_input(self, ws) -> None:
+        out = self._websockets.get(ws)
+        if out and out.handling:
+            out.handling -= 1
+
+    def get_client_count(self) -> int:
+        return len(self._websockets)
+
+    def get_reaped_count(self) -> int:
+        return self._reaped
+
+    def get_keepalive_stats(self) -> dict:
+        return {
+            'clients': len(self._websockets),
+            'pings': self._pings,
+            'reaped': self._reaped,
+            'ping_interval_s': self._ping_interval_s,
+            'ping_timeout_s': self._ping_timeout_s,
+            'subscribers': dict(self._subscribers)
+        }
+
+    def get_stats(self) -> list[dict]:
+        stats = []
+        for ws, out in self._websockets.items():
+            stats.append({
+                'client': getattr(ws.request, 'client_addr', None),
+                'binary': out.binary,
+                'deflate': out.deflate_wbits,
+                'topics': out.topics,
+                'depth': out.depth,
+                'queued_frames': len(out.frames),
+                'sent_frames': out.sent_frames,
+                'sent_bytes': out.sent_bytes
+            })
+
+        return stats
+
+    def _evict(self, out: _Outbound, reason: str) -> None:
+        self._logger.info(f"Evicting websocket: {reason}")
+        self.unregister(out.ws)
+
+        # The peer isn't reading, so a CLOSE frame would only queue up behind
+        # the backlog: drop the socket, and the handler's receive() fails and
+        # cleans up.
         try:
-            await ws.send(payload)
-            return True
+            out.ws.closed = True
+            out.ws.request.sock[1].close()
+
+        except Exception:
+            pass
+
+    async def _keepalive(self) -> None:
+        # Ping every socket each interval; one that sends nothing back (no
+        # pong, no input) within the timeout is dead and gets reaped before
+        # broadcasts waste more time on it. A socket whose last message is
+        # still being handled (a paste chunk) counts as alive: its pong sits
+        # unread until the handler returns to receive.
+        while True:
+            await asyncio.sleep(self._ping_interval_s)
+            if not self._websockets:
+                continue
+
+            pinged = []
+            for out in list(self._websockets.values()):
+                pinged.append((out, out.ws.received_frames))
+                self._enqueue(out, self._ping_frame)
+                self._pings += 1
+
+            await asyncio.sleep(self._ping_timeout_s)
+
+            for out, received in pinged:
+                if not out.closed and not out.handling and out.ws.received_frames == received:
+                    self._reaped += 1
+                    self._evict(out, f"no reply to ping within {self._ping_timeout_s} s")
+
+    def _enqueue(self, out: _Outbound, frame) -> None:
+        # an empty queue always takes the frame, so one large message can't evict
+        if out.depth and out.depth + len(frame) > self._max_queue_bytes:
+            self._evict(out, f"{out.depth} B queued, high-water mark {self._max_queue_bytes} B")
+            return
+
+        out.frames.append(frame)
+        out.depth += len(frame)
+        out.ready.set()
+
+    async def _sender(self, out: _Outbound) -> None:
+        ws = out.ws
+
+        try:
+            while not out.closed:
+                await out.ready.wait()
+                out.ready.clear()
+
+                while out.frames and not out.closed:
+                    frames = out.frames
+                    out.frames = []
+
+                    for frame in frames:
+                        await ws.send_frame(frame)
+                        out.depth -= len(frame)
+                        out.sent_frames += 1
+                        out.sent_bytes += len(frame)
 
         except Exception as e:
             if self._logger:
                 self._logger.info(f"Websocket send failed, removing ws: {e}")
 
-            try:
-                self._websockets.remove(ws)
+            self.unregister(ws)
+
+    @staticmethod
+    def _encode(data: dict, encoding: tuple):
+        binary, deflate_wbits = encoding
+        if binary:
+            payload = encode_binary(data)
+            if payload is not None:
+                return WebSocket.encode_frame(payload, deflate_wbits=deflate_wbits)
+
+        return WebSocket.encode_frame(encode_json(data), deflate_wbits=deflate_wbits)
+
+    async def send(self, ws, data: dict) -> None:
+        """Queue a message for one socket, in order with broadcasts."""
+        out = self._websockets.get(ws)
+        if out:
+            self._enqueue(out, self._encode(data, out.encoding))
+
+    async def broadcast(self, data: dict, topic: str = None) -> None:
+        """Queue a message for every socket (subscribed to topic, if given),
+        encoded once per encoding in use and not at all without recipients."""
+        if not self._websockets:
+            return
+
+        if topic and not self._subscribers.get(topic):
+            return
+
+        frames = {}
+        for out in list(self._websockets.values()):
+            if topic and topic not in out.topics:
+                continue
+
+            frame = frames.get(out.encoding)
+            if frame is None:
+                frame = frames[out.encoding] = self._encode(data, out.encoding)
+
+            self._enqueue(out, frame)
 
-            except Exception:
-                pass
+    async def broadcast_parts(self, parts: dict) -> None:
+        """Queue one combined message per socket from parts (topic -> dict), holding only
+        the topics it subscribes to; merged and encoded once per topic set and encoding."""
+        if not self._websockets:
+            return
 
-            return False
+        frames = {}
+        for out in list(self._websockets.values()):
+            key = (out.topics, out.encoding)
+            if key not in frames:
+                data = {}
+                for topic in out.topics:
+                    part = parts.get(topic)
+                    if part:
+                        data.update(part)
 
-    async def broadcast_payloads(self, payloads: list[str]) -> None:
-        for ws in self._websockets[:]:
-            for p in payloads:
-                ok = await self._safe_send(ws, p)
+                frames[key] = self._encode(data, out.encoding) if data else None
 
-                if not ok:
-                    break
+            if frames[key] is not None:
+                self._enqueue(out, frames[key])
@@ -0,0 +1,66 @@
+from libraries.microdot.websocket import WebSocket
+from src.logger import Logger
+from src.ws_protocol import MSG_INPUT
+
+
+class WebsocketInput:
+    """Per-connection assembly of client messages from WebSocket fragments.
+
+    JSON text messages are collected (up to max_text_bytes) and handed to the
+    handler whole; a longer one is dropped and on_drop gets its first bytes,
+    so the sender can be told. MSG_INPUT binary messages are handed over
+    fragment by fragment without their type byte, so a large paste is never
+    held in RAM.
+    """
+    def __init__(self, handler, max_text_bytes: int = 16384, on_drop=None) -> None:
+        self._handler = handler
+        self._on_drop = on_drop
+        self._max_text_bytes: int = max_text_bytes
+        self._text: bytearray = bytearray()
+        self._first: bool = True
+        self._streaming: bool = False
+        self._discard: bool = False
+        self._logger: Logger = Logger("WebsocketInput")
+
+    async def feed(self, opcode: int, data: bytes, fin: bool) -> None:
+        first = self._first
+        self._first = fin
+
+        if opcode == WebSocket.TEXT:
+            if first:
+                self._discard = False
+                self._text = bytearray()
+
+            if not self._discard:
+                if len(self._text) + len(data) > self._max_text_bytes:
+                    self._logger.info(f"Dropping text message over {self._max_text_bytes} B")
+                    head = bytes(self._text[:16]) if self._text else bytes(data[:16])
+                    self._discard = True
+                    self._text = bytearray()
+
+                    if self._on_drop:
+                        await self._on_drop(head)
+                else:
+                    self._text += data
+
+            if fin and not self._discard:
+                raw = bytes(self._text)
+                self._text = bytearray()
+
+                try:
+                    message = raw.decode()
+
+                except UnicodeError:
+                    self._logger.info("Dropping text message that is not valid UTF-8")
+                    return
+
+                await self._handler(message)
+
+            return
+
+        if first:
+            self._streaming = data[:1] == bytes([MSG_INPUT])
+            data = data[1:]
+
+        if self._streaming and data:
+            await self._handler(data)
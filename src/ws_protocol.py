@@ -0,0 +1,57 @@
+import json
+import struct
+
+# Opt-in compact protocol, negotiated with Sec-WebSocket-Protocol. Clients
+# that don't ask for it keep getting JSON text messages.
+BINARY_SUBPROTOCOL: str = 'picobridge.bin'
+
+# One-byte message types, followed by the fields below. Telemetry records
+# have a fixed size, and one message may carry several back to back.
+MSG_OUTPUT: int = 0x01      # UTF-8 terminal text (frames joined, split on '\n' by the client)
+MSG_ACTIVITY: int = 0x02    # u8 flags: bit0 rx, bit1 tx
+MSG_THROUGHPUT: int = 0x03  # u32 rx_bps, u32 tx_bps (big endian)
+MSG_SYSTEM: int = 0x04      # u32 mem_free, u32 mem_alloc (big endian)
+MSG_WEBSOCKETS: int = 0x05  # u16 ws_clients, u32 ws_reaped (big endian)
+
+# Client to server, on any connection: raw terminal input bytes. The message
+# may be fragmented; each fragment is written to the UART as it arrives.
+MSG_INPUT: int = 0x10
+
+# Broadcast topics a client can pick with {"subscribe": [...]}; new
+# connections get all of them.
+TOPIC_OUTPUT: str = 'output'
+TOPIC_ACTIVITY: str = 'activity'
+TOPIC_THROUGHPUT: str = 'throughput'
+TOPIC_SYSTEM: str = 'system'
+TOPICS: tuple = (TOPIC_OUTPUT, TOPIC_ACTIVITY, TOPIC_THROUGHPUT, TOPIC_SYSTEM)
+
+
+def encode_json(data: dict) -> str:
+    return json.dumps(data)
+
+
+def encode_binary(data: dict):
+    """Binary payload for a telemetry/output message, or None if it has no binary form."""
+    if 'output' in data:
+        output = data['output']
+        text = output if isinstance(output, str) else ''.join(output)
+
+        return bytes([MSG_OUTPUT]) + text.encode()
+
+    records = []
+    if 'rx' in data or 'tx' in data:
+        records.append(bytes([MSG_ACTIVITY, (1 if data.get('rx') else 0) | (2 if data.get('tx') else 0)]))
+
+    if 'rx_bps' in data:
+        records.append(struct.pack('>BII', MSG_THROUGHPUT, data['rx_bps'], data['tx_bps']))
+
+    if 'mem_free' in data:
+        records.append(struct.pack('>BII', MSG_SYSTEM, data['mem_free'], data['mem_alloc']))
+
+    if 'ws_clients' in data:
+        records.append(struct.pack('>BHI', MSG_WEBSOCKETS, data['ws_clients'], data['ws_reaped']))
+
+    if not records:
+        return None
+
+    return records[0] if len(records) == 1 else b''.join(records)
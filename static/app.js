@@ -8,10 +8,31 @@ document.addEventListener("DOMContentLoaded", function () {
   const downloadBtn = document.getElementById("download-output");
   const clearBtn = document.getElementById("clear-output");
 
-  const ws = new WebSocket(`ws://${location.host}/ws`);
+  // Opt in to the compact binary protocol with ?ws=binary; JSON otherwise
+  const useBinary = new URLSearchParams(location.search).get("ws") === "binary";
+  const ws = useBinary
+    ? new WebSocket(`ws://${location.host}/ws`, ["picobridge.bin"])
+    : new WebSocket(`ws://${location.host}/ws`);
+  ws.binaryType = "arraybuffer";
+
+  // ?topics=output,system limits which broadcasts this page receives
+  const topics = new URLSearchParams(location.search).get("topics");
+  if (topics) {
+    ws.addEventListener("open", () => ws.send(JSON.stringify({ subscribe: topics.split(",") })));
+  }
+  const utf8 = new TextDecoder();
 
   let expectPassword = false;
 
+  // Multi-line pastes are streamed: line-aligned chunks, each sent only once
+  // the bridge has acked the previous one, so the UART sets the pace.
+  // ?paste=prompt waits for the device prompt after every line.
+  const PASTE_CHUNK = 1024;
+  const PASTE_ACK_TIMEOUT_MS = 30000;
+  const pasteMode = new URLSearchParams(location.search).get("paste");
+  let pasteId = 0;
+  let pasteWaiter = null;
+
   function getTerminalText() {
     return output.innerText || output.textContent || "";
   }
@@ -85,9 +106,81 @@ document.addEventListener("DOMContentLoaded", function () {
     }
   }
 
+  // "output" is a single frame or a batch of frames from one RX read
+  function appendOutput(frames) {
+    if (!Array.isArray(frames)) frames = [frames];
+    if (!frames.length) return;
+
+    const frag = document.createDocumentFragment();
+    frames.forEach(line => {
+      const div = document.createElement("div");
+      div.textContent = line;
+      frag.appendChild(div);
+    });
+    output.appendChild(frag);
+    output.scrollTop = output.scrollHeight;
+
+    frames.forEach(updatePromptState);
+  }
+
+  function updatePromptState(out) {
+    if (/\bpassword\s*:?\s*$/i.test(out) || out.toLowerCase().includes("password:")) {
+      expectPassword = true;
+      setInputForPassword(true);
+    } else if (
+      /\b(username|user\s*name|login)\s*:?\s*$/i.test(out) ||
+      out.trim().endsWith(">") ||
+      out.trim().endsWith("#")
+    ) {
+      expectPassword = false;
+      setInputForPassword(false);
+    }
+  }
+
+  // Binary messages: one type byte, then UTF-8 text, or one or more
+  // fixed-size telemetry records back to back (big-endian fields)
+  function decodeBinary(buf) {
+    const view = new DataView(buf);
+    if (view.getUint8(0) === 0x01) {
+      return { output: utf8.decode(new Uint8Array(buf, 1)).match(/[^\n]*\n|[^\n]+$/g) || [] };
+    }
+
+    const data = {};
+    let i = 0;
+    while (i < buf.byteLength) {
+      switch (view.getUint8(i)) {
+        case 0x02: {
+          const flags = view.getUint8(i + 1);
+          data.rx = Boolean(flags & 1);
+          data.tx = Boolean(flags & 2);
+          i += 2;
+          break;
+        }
+        case 0x03:
+          data.rx_bps = view.getUint32(i + 1);
+          data.tx_bps = view.getUint32(i + 5);
+          i += 9;
+          break;
+        case 0x04:
+          data.mem_free = view.getUint32(i + 1);
+          data.mem_alloc = view.getUint32(i + 5);
+          i += 9;
+          break;
+        case 0x05:
+          data.ws_clients = view.getUint16(i + 1);
+          data.ws_reaped = view.getUint32(i + 3);
+          i += 7;
+          break;
+        default:
+          return data;
+      }
+    }
+    return data;
+  }
+
   ws.onmessage = function (event) {
     try {
-      const data = JSON.parse(event.data);
+      const data = typeof event.data === "string" ? JSON.parse(event.data) : decodeBinary(event.data);
 
       if (data.rx) {
         rxLed.classList.add("on");
@@ -99,23 +192,13 @@ document.addEventListener("DOMContentLoaded", function () {
       }
 
       if (data.output) {
-        const div = document.createElement("div");
-        div.textContent = data.output;
-        output.appendChild(div);
-        output.scrollTop = output.scrollHeight;
-
-        const out = data.output;
-        if (/\bpassword\s*:?\s*$/i.test(out) || out.toLowerCase().includes("password:")) {
-          expectPassword = true;
-          setInputForPassword(true);
-        } else if (
-          /\b(username|user\s*name|login)\s*:?\s*$/i.test(out) ||
-          out.trim().endsWith(">") ||
-          out.trim().endsWith("#")
-        ) {
-          expectPassword = false;
-          setInputForPassword(false);
-        }
+        appendOutput(data.output);
+      }
+
+      if (data.paste && pasteWaiter) {
+        const resolve = pasteWaiter;
+        pasteWaiter = null;
+        resolve(data.paste);
       }
 
       if (data.rx_bps !== undefined && data.tx_bps !== undefined) {
@@ -129,11 +212,92 @@ document.addEventListener("DOMContentLoaded", function () {
         document.getElementById("mem-free").textContent =
           `${data.mem_free.toLocaleString()} B`;
       }
+
+      if (data.ws_clients !== undefined) {
+        document.getElementById("ws-clients").textContent = data.ws_clients;
+        document.getElementById("ws-reaped").textContent = data.ws_reaped;
+      }
     } catch (err) {
       console.error("WebSocket error:", err);
     }
   };
 
+  function pasteChunks(text) {
+    const chunks = [];
+    let chunk = "";
+    for (let line of text.match(/[^\n]*\n|[^\n]+$/g) || []) {
+      if (chunk && chunk.length + line.length > PASTE_CHUNK) {
+        chunks.push(chunk);
+        chunk = "";
+      }
+      // a line longer than a chunk goes out in pieces; the bridge only
+      // terminates the piece that ends with the newline
+      while (line.length > PASTE_CHUNK) {
+        chunks.push(line.slice(0, PASTE_CHUNK));
+        line = line.slice(PASTE_CHUNK);
+      }
+      chunk += line;
+    }
+    if (chunk) chunks.push(chunk);
+    return chunks;
+  }
+
+  function waitForAck(message) {
+    return new Promise(resolve => {
+      const timer = setTimeout(() => {
+        if (pasteWaiter === settle) {
+          pasteWaiter = null;
+          resolve({ lines: 0, error: "no reply from the bridge" });
+        }
+      }, PASTE_ACK_TIMEOUT_MS);
+      const settle = ack => {
+        clearTimeout(timer);
+        resolve(ack);
+      };
+      pasteWaiter = settle;
+      ws.send(JSON.stringify(message));
+    });
+  }
+
+  async function streamPaste(text) {
+    const id = ++pasteId;
+    const chunks = pasteChunks(text);
+    let lines = 0;
+
+    terminalInput.disabled = true;
+    try {
+      for (let seq = 0; seq < chunks.length; seq++) {
+        const ack = await waitForAck({
+          paste: { id, seq, data: chunks[seq], last: seq === chunks.length - 1, mode: pasteMode }
+        });
+        lines += ack.lines;
+        terminalInput.placeholder = `Pasting... ${lines} lines sent`;
+        if (ack.error) {
+          terminalInput.placeholder = `Paste stopped after ${lines} lines (${ack.error})`;
+          return;
+        }
+      }
+      terminalInput.placeholder = `Pasted ${lines} lines`;
+    } finally {
+      terminalInput.disabled = false;
+      terminalInput.focus();
+    }
+  }
+
+  // a paste in flight must not wait forever on a connection that is gone
+  ws.addEventListener("close", () => {
+    const resolve = pasteWaiter;
+    pasteWaiter = null;
+    if (resolve) resolve({ lines: 0, error: "connection closed" });
+  });
+
+  terminalInput.addEventListener("paste", e => {
+    const text = (e.clipboardData || window.clipboardData).getData("text");
+    if (!text.includes("\n") || pasteWaiter) return;
+    e.preventDefault();
+    streamPaste(text);
+  });
+
   terminalForm.addEventListener("submit", e => {
     e.preventDefault();
     const val = terminalInput.value;
@@ -0,0 +1,16 @@
+import os
+
+import pytest
+
+# test_benchmark_* time things and print tables; they only run on request:
+#   PICOBRIDGE_BENCH=1 python -m pytest -q -s tests
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ.get('PICOBRIDGE_BENCH'):
+        return
+
+    skip = pytest.mark.skip(reason="benchmark, set PICOBRIDGE_BENCH=1 to run")
+    for item in items:
+        if item.name.startswith('test_benchmark_'):
+            item.add_marker(skip)
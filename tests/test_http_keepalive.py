@@ -0,0 +1,174 @@
+import asyncio
+import os
+import time
+
+from libraries.microdot.microdot import Microdot, send_file
+
+STATIC = os.path.join(os.path.dirname(__file__), '..', 'static') + os.sep
+
+# what a page load fetches after the index
+PAGE = ['/', '/static/app.js', '/static/styles.css', '/static/favicon.ico',
+        '/api/v1/pb/settings', '/api/v1/pb/identify']
+
+
+def make_app(keep_alive_timeout: float = 5, max_requests: int = 100) -> Microdot:
+    app = Microdot()
+    app.keep_alive_timeout = keep_alive_timeout
+    app.keep_alive_max_requests = max_requests
+
+    @app.get('/')
+    async def index(req):
+        return '<html>' + 'x' * 2000 + '</html>', {'Content-Type': 'text/html'}
+
+    @app.get('/static/<path:path>')
+    async def static(req, path):
+        return send_file(STATIC + path)
+
+    @app.get('/api/v1/pb/settings')
+    async def settings(req):
+        return {'uart': {'baudrate': 9600}}
+
+    @app.get('/api/v1/pb/identify')
+    async def identify(req):
+        return {'identify': False}
+
+    return app
+
+
+async def _serve(app: Microdot):
+    task = asyncio.create_task(app.start_server(host='127.0.0.1', port=0))
+    while app.server is None or not app.server.sockets:
+        await asyncio.sleep(0)
+    return task, app.server.sockets[0].getsockname()[1]
+
+
+async def _read_response(reader) -> tuple:
+    status = await reader.readline()
+    headers = {}
+    while True:
+        line = (await reader.readline()).strip().decode()
+        if not line:
+            break
+        name, value = line.split(':', 1)
+        headers[name.lower()] = value.strip()
+    if 'content-length' in headers:
+        body = await reader.readexactly(int(headers['content-length']))
+    else:
+        body = await reader.read()
+    return status.decode(), headers, body
+
+
+async def _get(reader, writer, path: str, version: str = '1.1', connection: str = None) -> tuple:
+    head = f'GET {path} HTTP/{version}\r\nHost: pico\r\n'
+    if connection:
+        head += f'Connection: {connection}\r\n'
+    writer.write((head + '\r\n').encode())
+    await writer.drain()
+    return await _read_response(reader)
+
+
+def test_requests_share_one_connection():
+    async def run():
+        app = make_app()
+        task, port = await _serve(app)
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+
+        responses = [await _get(reader, writer, path) for path in PAGE]
+        writer.close()
+        app.shutdown()
+        task.cancel()
+        return responses
+
+    responses = asyncio.run(run())
+    assert [r[0].split()[1] for r in responses] == ['200'] * len(PAGE)
+    assert all(r[1]['connection'] == 'keep-alive' for r in responses)
+    with open(STATIC + 'app.js', 'rb') as f:
+        assert responses[1][2] == f.read()
+
+
+def test_close_request_cap_and_http10():
+    async def run():
+        app = make_app(max_requests=2)
+        task, port = await _serve(app)
+        results = []
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        results.append((await _get(reader, writer, '/', connection='close'))[1]['connection'])
+        results.append(await reader.read())  # server closed: EOF
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        results.append((await _get(reader, writer, '/', version='1.0'))[1]['connection'])
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        first = await _get(reader, writer, '/')
+        second = await _get(reader, writer, '/')
+        results.append((first[1]['keep-alive'], second[1]['connection']))
+
+        app.shutdown()
+        task.cancel()
+        return results
+
+    assert asyncio.run(run()) == ['close', b'', 'close', ('timeout=5, max=1', 'close')]
+
+
+def test_idle_connection_is_closed_after_timeout():
+    async def run():
+        app = make_app(keep_alive_timeout=0.05)
+        task, port = await _serve(app)
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        await _get(reader, writer, '/')
+
+        t0 = time.perf_counter()
+        eof = await asyncio.wait_for(reader.read(), 1)
+        elapsed = time.perf_counter() - t0
+        app.shutdown()
+        task.cancel()
+        return eof, elapsed
+
+    eof, elapsed = asyncio.run(run())
+    assert eof == b''
+    assert elapsed < 0.5
+
+
+def test_benchmark_page_load_round_trips():
+    loads = 20
+
+    async def page_load(port: int, keep_alive: bool) -> int:
+        connects = 0
+        reader = writer = None
+        for path in PAGE:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                connects += 1
+            await _get(reader, writer, path, connection=None if keep_alive else 'close')
+            if not keep_alive:
+                writer.close()
+                writer = None
+        if writer:
+            writer.close()
+        return connects
+
+    async def run(keep_alive: bool) -> tuple:
+        app = make_app(keep_alive_timeout=5 if keep_alive else 0)
+        task, port = await _serve(app)
+        t0 = time.perf_counter()
+        connects = 0
+        for _ in range(loads):
+            connects += await page_load(port, keep_alive)
+        elapsed = (time.perf_counter() - t0) / loads * 1e3
+        app.shutdown()
+        task.cancel()
+        return connects / loads, elapsed
+
+    before = asyncio.run(run(False))
+    after = asyncio.run(run(True))
+
+    # each new connection costs a TCP handshake round trip (plus the FIN
+    # exchange) before the request's own round trip
+    print()
+    print(f"  {'':<12} {'connects':>9} {'round trips':>12} {'ms/load':>8}")
+    for name, (connects, ms) in (('close', before), ('keep-alive', after)):
+        print(f"  {name:<12} {connects:>9.0f} {connects + len(PAGE):>12.0f} {ms:>8.2f}")
+
+    assert before[0] == len(PAGE)
+    assert after[0] == 1
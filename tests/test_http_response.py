@@ -0,0 +1,88 @@
+import asyncio
+import io
+import json
+import os
+
+from libraries.microdot.microdot import Response
+
+STATIC = os.path.join(os.path.dirname(__file__), '..', 'static') + os.sep
+
+
+class CountingStream:
+    def __init__(self) -> None:
+        self.writes = []
+
+    async def awrite(self, data) -> None:
+        self.writes.append(bytes(data))
+
+
+def _write(res: Response) -> CountingStream:
+    stream = CountingStream()
+    asyncio.run(res.write(stream))
+    return stream
+
+
+def _legacy_writes(res: Response, body_chunks: int) -> int:
+    # status line, one write per header line, blank line, then each body chunk
+    headers = sum(len(v) if isinstance(v, list) else 1 for v in res.headers.values())
+    return 1 + headers + 1 + body_chunks
+
+
+def test_small_response_is_one_write():
+    res = Response({'uart': {'baudrate': 9600, 'bits': 8}})
+    stream = _write(res)
+
+    assert len(stream.writes) == 1
+    head, body = stream.writes[0].split(b'\r\n\r\n', 1)
+    assert head.startswith(b'HTTP/1.1 200 OK\r\n')
+    assert b'Content-Length: %d' % len(body) in head
+    assert json.loads(body) == {'uart': {'baudrate': 9600, 'bits': 8}}
+
+
+def test_large_body_keeps_bytes_and_order():
+    body = os.urandom(5000)
+    res = Response(body, headers={'Set-Cookie': ['a=1', 'b=2']})
+    stream = _write(res)
+
+    assert len(stream.writes) == 2
+    data = b''.join(stream.writes)
+    assert data.endswith(b'\r\n\r\n' + body)
+    assert b'Set-Cookie: a=1\r\nSet-Cookie: b=2\r\n' in data
+    # the first write carries the head and one buffer's worth of the body
+    assert len(stream.writes[0]) == data.index(b'\r\n\r\n') + 4 + Response.send_file_buffer_size
+
+
+def test_head_and_empty_responses_send_only_the_head():
+    res = Response('hello')
+    res.is_head = True
+    assert len(_write(res).writes) == 1
+
+    stream = _write(Response(status_code=204, body=''))
+    assert len(stream.writes) == 1
+    assert stream.writes[0].endswith(b'\r\n\r\n')
+
+
+def test_benchmark_packets_per_response():
+    with open(STATIC + 'app.js', 'rb') as f:
+        app_js = f.read()
+
+    cases = {
+        'settings JSON': (lambda: Response({'uart': {'baudrate': 9600}, 'location': 'lab'}), 1),
+        'identify (204)': (lambda: Response(status_code=204, body=''), 0),
+        'index page 6KB': (lambda: Response('x' * 6000, headers={'Content-Type': 'text/html'}), 1),
+        'app.js (file)': (lambda: Response.send_file(STATIC + 'app.js'),
+                          len(app_js) // Response.send_file_buffer_size + 1),
+        'app.js (stream)': (lambda: Response(io.BytesIO(app_js)),
+                            len(app_js) // Response.send_file_buffer_size + 1),
+    }
+
+    print()
+    print(f"  {'response':<16} {'writes before':>13} {'writes after':>12}")
+    for name, (make, body_chunks) in cases.items():
+        res = make()
+        after = len(_write(res).writes)
+        before = _legacy_writes(res, body_chunks)
+        print(f"  {name:<16} {before:>13} {after:>12}")
+        # the head never costs a write of its own
+        assert after <= max(body_chunks, 1) + 1
+        assert after < before
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import time
+
+import src.terminal_framer as tf
+from libraries.microdot.websocket import WebSocket
+from src.terminal_output import TerminalOutput
+from src.ws_protocol import TOPIC_OUTPUT
+
+
+def _console_output(size: int) -> bytes:
+    lines = [
+        b"interface GigabitEthernet1/0/%d\r\n description access port\r\n switchport mode access\r\n!\r\n" % i
+        for i in range(48)
+    ]
+    data = b"".join(lines)
+
+    return (data * (size // len(data) + 1))[:size]
+
+
+def _run(monkeypatch, batched: bool, clients: int = 4) -> tuple:
+    monkeypatch.setattr(tf.time, "ticks_ms", lambda: 0, raising=False)
+    data = _console_output(1024 * 1024)
+    framer = tf.TerminalFramer()
+    messages = 0
+
+    t0 = time.process_time()
+    for i in range(0, len(data), 512):
+        frames = framer.process_chunk(data[i:i + 512])
+        if not frames:
+            continue
+
+        if batched:
+            payloads = [json.dumps({'output': frames})]
+        else:
+            payloads = [json.dumps({'output': f}) for f in frames]
+
+        for _ in range(clients):
+            for p in payloads:
+                WebSocket._encode_websocket_frame(WebSocket.TEXT, p)
+                messages += 1
+
+    return (time.process_time() - t0) * 1000, messages
+
+
+class FakeWsManager:
+    def __init__(self) -> None:
+        self.sent = []
+
+    async def broadcast(self, payload: dict, topic: str) -> None:
+        self.sent.append((payload, topic))
+
+
+def test_batching_sends_one_message_per_rx_read(monkeypatch):
+    monkeypatch.setattr(tf.time, "ticks_ms", lambda: 0, raising=False)
+    data = _console_output(64 * 1024)
+    framer = tf.TerminalFramer()
+    ws = FakeWsManager()
+    output = TerminalOutput(framer, ws)
+
+    async def main():
+        for i in range(0, len(data), 512):
+            await output.feed(data[i:i + 512])
+
+    asyncio.run(main())
+
+    # 64 KB in 512 B reads, every read completes lines: one message per read
+    assert len(ws.sent) == 128
+    assert all(topic == TOPIC_OUTPUT == 'output' for _, topic in ws.sent)
+    assert all(list(payload) == ['output'] and len(payload['output']) > 1 for payload, _ in ws.sent)
+    lines = "".join(f for payload, _ in ws.sent for f in payload['output']).split()
+    # the trailing partial line waits for the idle flush
+    assert lines == data.decode().split()[:len(lines)]
+    assert len(lines) == len(data[:data.rindex(b"\n")].decode().split())
+
+
+def test_benchmark_cpu_per_mb(monkeypatch):
+    before_ms, before_msgs = _run(monkeypatch, batched=False)
+    after_ms, after_msgs = _run(monkeypatch, batched=True)
+
+    print()
+    print(f"  1 MB console output, 4 WebSocket clients")
+    print(f"  {'':<12} {'CPU ms/MB':>10} {'ws messages':>12}")
+    print(f"  {'per frame':<12} {before_ms:>10.1f} {before_msgs:>12}")
+    print(f"  {'batched':<12} {after_ms:>10.1f} {after_msgs:>12}")
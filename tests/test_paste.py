@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+from src.paste import PASTE_PROMPT, PASTE_RATE, PasteStreamer
+from src.terminal_framer import TerminalFramer
+
+
+class FakeUartTx:
+    def __init__(self, on_write=None) -> None:
+        self.writes = []
+        self._on_write = on_write
+
+    async def write(self, buf: bytes) -> int:
+        self.writes.append(buf)
+        if self._on_write:
+            self._on_write(buf)
+        return len(buf)
+
+
+CONFIG = "interface Gi0/1\n description uplink\r\n no shutdown\n!"
+
+
+def test_rate_mode_sends_one_terminated_write_per_line():
+    async def run():
+        tx = FakeUartTx()
+        result = await PasteStreamer(tx, asyncio.Event()).send(CONFIG, crlf_to_uart=True)
+        return tx, result
+
+    tx, (lines, sent, error) = asyncio.run(run())
+    assert tx.writes == [b"interface Gi0/1\r", b" description uplink\r", b" no shutdown\r", b"!\r"]
+    assert (lines, sent, error) == (4, sum(len(w) for w in tx.writes), None)
+
+
+def test_prompt_mode_waits_for_the_device_between_lines():
+    async def run():
+        prompt = asyncio.Event()
+        order = []
+
+        def device(buf: bytes) -> None:
+            order.append(('line', buf))
+
+            # the device answers each line with a prompt a little later
+            async def answer():
+                await asyncio.sleep(0.005)
+                order.append(('prompt', None))
+                prompt.set()
+
+            asyncio.create_task(answer())
+
+        streamer = PasteStreamer(FakeUartTx(device), prompt, prompt_timeout_ms=500)
+        result = await streamer.send("conf t\nhostname R1\nend", crlf_to_uart=False, mode=PASTE_PROMPT)
+        return order, result
+
+    order, result = asyncio.run(run())
+    assert [kind for kind, _ in order] == ['line', 'prompt'] * 3
+    assert order[2] == ('line', b"hostname R1\n")
+    assert result[0] == 3 and result[2] is None
+
+
+def test_prompt_mode_paced_by_framer_token_hits(monkeypatch):
+    monkeypatch.setattr(time, "ticks_ms", lambda: 1000, raising=False)
+    monkeypatch.setattr(time, "ticks_diff", lambda a, b: a - b, raising=False)
+
+    async def run():
+        prompt = asyncio.Event()
+        framer = TerminalFramer(flush_tokens=['Password:', 'Router#'], on_prompt=prompt.set)
+        frames = []
+
+        def device(buf: bytes) -> None:
+            # echo plus a configured prompt token: the framer flushes it at
+            # once, so the idle flush never runs and can't be what wakes us
+            async def answer():
+                await asyncio.sleep(0.005)
+                frames.extend(framer.process_chunk(buf.rstrip(b'\r') + b'\r\nRouter#'))
+                assert not framer.has_partial()
+
+            asyncio.create_task(answer())
+
+        streamer = PasteStreamer(FakeUartTx(device), prompt, prompt_timeout_ms=500)
+        result = await streamer.send("conf t\nhostname R1\nend", crlf_to_uart=True, mode=PASTE_PROMPT)
+        return frames, result
+
+    frames, (lines, _, error) = asyncio.run(run())
+    assert (lines, error) == (3, None)
+    assert frames[-2:] == ['end\n', 'Router#\n']
+
+
+def test_prompt_mode_stops_when_the_device_goes_quiet():
+    async def run():
+        tx = FakeUartTx()
+        result = await PasteStreamer(tx, asyncio.Event(), prompt_timeout_ms=20).send(
+            "reload\nyes\n", crlf_to_uart=True, mode=PASTE_PROMPT)
+        return tx, result
+
+    tx, (lines, _, error) = asyncio.run(run())
+    assert tx.writes == [b"reload\r"]
+    assert (lines, error) == (1, 'timeout')
+
+
+def test_empty_paste_sends_nothing():
+    tx = FakeUartTx()
+    assert asyncio.run(PasteStreamer(tx, asyncio.Event()).send("", True, PASTE_RATE)) == (0, 0, None)
+    assert tx.writes == []
+
+
+def test_long_line_split_across_chunks_is_terminated_once():
+    async def run():
+        tx = FakeUartTx()
+        streamer = PasteStreamer(tx, asyncio.Event())
+        first = await streamer.send("banner motd ^" + "x" * 20, True, PASTE_RATE, final=False)
+        second = await streamer.send("x" * 20 + "^\nend", True, PASTE_RATE, final=True)
+        return tx, first, second
+
+    tx, first, second = asyncio.run(run())
+    assert b"".join(tx.writes) == b"banner motd ^" + b"x" * 40 + b"^\rend\r"
+    assert (first[0], second[0]) == (0, 2)
@@ -0,0 +1,56 @@
+import src.prompt_matcher as pm
+
+
+def test_finds_first_token_and_end_index():
+    m = pm.PromptMatcher(('Username:', 'Password:', '--More--'))
+
+    assert m.feed("line one --More-- rest") == (17, '--More--')
+    assert m.feed("no prompt here") == (-1, None)
+
+
+def test_state_carries_across_feeds():
+    m = pm.PromptMatcher(('Password:',))
+
+    assert m.feed("Pass") == (-1, None)
+    assert m.feed("wo") == (-1, None)
+    assert m.feed("rd: ") == (3, 'Password:')
+
+
+def test_reset_discards_partial_match():
+    m = pm.PromptMatcher(('Password:',))
+
+    m.feed("Passw")
+    m.reset()
+    assert m.feed("ord:") == (-1, None)
+
+
+def test_feed_from_offset_and_restart_after_hit():
+    m = pm.PromptMatcher(('[yes/no]', '[confirm]'))
+    text = "Save? [yes/no] then [confirm]"
+
+    end, tok = m.feed(text)
+    assert (end, tok) == (14, '[yes/no]')
+    assert m.feed(text, end) == (len(text), '[confirm]')
+
+
+def test_overlapping_tokens_use_fail_links():
+    m = pm.PromptMatcher(('Router#', 'er#x', 'ter#'))
+
+    # 'Router#' and 'ter#' complete on the same char: the longer one wins
+    assert m.feed("Router#") == (7, 'Router#')
+    # 'Rou' is a dead end; the automaton falls back and still finds 'ter#'
+    assert m.feed("Routter#") == (8, 'ter#')
+
+
+def test_contained_token_completes_first():
+    m = pm.PromptMatcher((' --More-- ', 'More'))
+
+    assert m.feed(" --More-- ") == (7, 'More')
+
+
+def test_empty_tokens_are_ignored():
+    m = pm.PromptMatcher(('', 'login:'))
+
+    # an empty token would otherwise complete on the first character
+    assert m.feed("pico ") == (-1, None)
+    assert m.feed("pico login:") == (11, 'login:')
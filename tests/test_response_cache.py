@@ -0,0 +1,84 @@
+import os
+import time
+import types
+
+from libraries.microdot.microdot import NoCaseDict
+from src.response_cache import ResponseCache
+from src.static_files import StaticFiles
+
+STATIC = os.path.join(os.path.dirname(__file__), '..', 'static') + os.sep
+
+
+def _req(headers: dict = None):
+    return types.SimpleNamespace(headers=NoCaseDict(headers or {}), args={})
+
+
+def test_lru_eviction_within_byte_budget():
+    cache = ResponseCache(max_bytes=300, max_entry_bytes=200)
+    cache.put('a', 1, b'a' * 100)
+    cache.put('b', 1, b'b' * 100)
+    cache.put('c', 1, b'c' * 100)
+    assert cache.get('a', 1) == b'a' * 100  # a is now the most recent
+
+    cache.put('d', 1, b'd' * 100)  # evicts b, the least recently used
+
+    assert cache.get('b', 1) is None
+    assert cache.get('a', 1) and cache.get('c', 1) and cache.get('d', 1)
+    assert cache.get_stats() == {'entries': 3, 'bytes': 300, 'max_bytes': 300,
+                                 'hits': 4, 'misses': 1, 'evictions': 1}
+
+
+def test_validator_change_and_oversized_bodies():
+    cache = ResponseCache(max_bytes=1000, max_entry_bytes=100)
+    cache.put('/', '1.6', b'old page')
+
+    assert cache.get('/', '1.7') is None  # version changed: stale entry dropped
+    assert cache.get_stats()['bytes'] == 0
+
+    big = b'x' * 101
+    assert cache.put('/', '1.7', big) is big
+    assert cache.get('/', '1.7') is None
+    assert cache.get_stats()['entries'] == 0
+
+
+def test_static_files_served_from_cache_until_changed(tmp_path):
+    (tmp_path / 'app.js').write_bytes(b'let a = 1;\n')
+    cache = ResponseCache()
+    files = StaticFiles(str(tmp_path) + os.sep, cache=cache)
+
+    first = files.response(_req(), 'app.js')
+    second = files.response(_req(), 'app.js')
+    assert first.body == second.body == b'let a = 1;\n'
+    assert second.headers['Content-Type'] == 'application/javascript'
+    assert cache.get_stats()['hits'] == 1
+
+    (tmp_path / 'app.js').write_bytes(b'let a = 22;\n')
+    third = files.response(_req(), 'app.js')
+    assert third.body == b'let a = 22;\n'
+    assert third.headers['ETag'] != first.headers['ETag']
+
+
+def test_benchmark_static_cache():
+    rounds = 500
+    headers = {'Accept-Encoding': 'gzip'}
+
+    def serve(files: StaticFiles) -> float:
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            res = files.response(_req(headers), 'app.js')
+            if not isinstance(res.body, bytes):
+                while res.body.read(1024):
+                    pass
+                res.body.close()
+        return (time.perf_counter() - t0) / rounds * 1e6
+
+    cache = ResponseCache()
+    flash = serve(StaticFiles(STATIC))
+    ram = serve(StaticFiles(STATIC, cache=cache))
+
+    print()
+    print(f"{'app.js.gz':<10}{'us/req':>10}")
+    print(f"{'file':<10}{flash:>10.1f}")
+    print(f"{'cache':<10}{ram:>10.1f}")
+
+    assert cache.get_stats()['hits'] == rounds - 1
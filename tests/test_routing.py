@@ -0,0 +1,110 @@
+import time
+import types
+
+from libraries.microdot.microdot import Microdot
+
+# the routes main.py registers, in order
+ROUTES = [
+    ('GET', '/static/<path:path>'), ('GET', '/'), ('GET', '/ws'),
+    ('GET', '/api/v1/pb/settings'), ('POST', '/api/v1/pb/settings'),
+    ('GET', '/api/v1/pb/uart_to_crlf/enable'), ('GET', '/api/v1/pb/uart_to_crlf/disable'),
+    ('GET', '/api/v1/pb/crlf_to_uart/enable'), ('GET', '/api/v1/pb/crlf_to_uart/disable'),
+    ('POST', '/api/v1/pb/display/test'), ('GET', '/api/v1/pb/identify/start'),
+    ('GET', '/api/v1/pb/identify/stop'), ('GET', '/api/v1/pb/clients'),
+    ('GET', '/api/v1/pb/websockets'), ('GET', '/api/v1/pb/http'),
+    ('GET', '/api/v1/pb/system'), ('GET', '/api/v1/pb/identify'),
+]
+
+
+def _handler(name: str):
+    async def handler(req, **kwargs):
+        return name
+    handler.__name__ = name
+    return handler
+
+
+def make_app() -> Microdot:
+    app = Microdot()
+    for method, path in ROUTES:
+        app.route(path, methods=[method])(_handler(method + ' ' + path))
+    return app
+
+
+def _req(method: str, path: str):
+    return types.SimpleNamespace(method=method, path=path, url_args=None)
+
+
+def linear_find_route(app: Microdot, req):
+    # the scan find_route used before the index, as the reference
+    method = 'GET' if req.method == 'HEAD' else req.method
+    f, p, s = 404, '', None
+    for route_methods, route_pattern, route_handler, url_prefix, subapp in app.url_map:
+        req.url_args = route_pattern.match(req.path)
+        if req.url_args is not None:
+            p, s = url_prefix, subapp
+            if method in route_methods:
+                f = route_handler
+                break
+            f = 405
+    return f, p, s
+
+
+def _check(app: Microdot, cases) -> None:
+    for method, path in cases:
+        fast, slow = _req(method, path), _req(method, path)
+        assert app.find_route(fast) == linear_find_route(app, slow), (method, path)
+        if callable(app.find_route(fast)[0]):
+            assert fast.url_args == slow.url_args, (method, path)
+
+
+def test_matches_linear_scan():
+    app = make_app()
+    cases = [(m, p) for _, p in ROUTES for m in ('GET', 'POST', 'HEAD', 'DELETE')]
+    cases += [('GET', '/static/app.js'), ('GET', '/static/a/b.css'), ('GET', '/nope'),
+              ('GET', '/api/v1/pb'), ('GET', '/api/v1/pb/settings/')]
+    _check(app, cases)
+
+
+def test_registration_order_wins_and_late_routes_are_indexed():
+    app = Microdot()
+    app.route('/users/<int:id>')(_handler('by id'))
+    app.route('/users/42')(_handler('static 42'))
+    app.route('/users/me', methods=['POST'])(_handler('post me'))
+    app.route('/users/<name>')(_handler('by name'))
+    app.route('/a.b')(_handler('dotted'))
+
+    assert app.find_route(_req('GET', '/users/42'))[0].__name__ == 'by id'
+    assert app.find_route(_req('GET', '/users/me'))[0].__name__ == 'by name'
+    assert app.find_route(_req('DELETE', '/users/me'))[0] == 405
+    assert app.find_route(_req('GET', '/aXb'))[0].__name__ == 'dotted'  # '.' is a regex in the pattern
+
+    app.route('/late')(_handler('late'))
+    sub = Microdot()
+    sub.route('/info')(_handler('sub info'))
+    app.mount(sub, url_prefix='/sub')
+
+    assert app.find_route(_req('GET', '/late'))[0].__name__ == 'late'
+    assert app.find_route(_req('GET', '/sub/info')) == (sub.url_map[0][2], '/sub', sub)
+    _check(app, [('GET', '/users/42'), ('GET', '/users/x'), ('POST', '/users/me'),
+                 ('GET', '/sub/info'), ('POST', '/late'), ('GET', '/aXb')])
+
+
+def test_benchmark_find_route():
+    app = make_app()
+    paths = [('GET', p) for m, p in ROUTES if m == 'GET' and '<' not in p] + [('GET', '/static/app.js')]
+    rounds = 500
+
+    def run(find) -> float:
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            for method, path in paths:
+                find(_req(method, path))
+        return (time.perf_counter() - t0) / (rounds * len(paths)) * 1e6
+
+    linear = min(run(lambda req: linear_find_route(app, req)) for _ in range(3))
+    indexed = min(run(app.find_route) for _ in range(3))
+
+    print()
+    print(f"{'find_route':<12}{'us/lookup':>12}")
+    print(f"{'linear':<12}{linear:>12.2f}")
+    print(f"{'indexed':<12}{indexed:>12.2f}")
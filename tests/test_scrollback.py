@@ -0,0 +1,32 @@
+import src.scrollback as sb
+
+
+def test_snapshot_before_wrap():
+    ring = sb.Scrollback(size=16)
+    ring.append(b"hello ")
+    ring.append(memoryview(b"world"))
+
+    assert ring.snapshot() == b"hello world"
+
+
+def test_append_wraps_and_keeps_newest_bytes():
+    ring = sb.Scrollback(size=8)
+    ring.append(b"abcdef")
+    ring.append(b"ghijk")
+
+    assert ring.snapshot() == b"defghijk"
+
+
+def test_append_larger_than_ring_keeps_tail():
+    ring = sb.Scrollback(size=4)
+    ring.append(b"x")
+    ring.append(b"0123456789")
+
+    assert ring.snapshot() == b"6789"
+
+
+def test_zero_size_ring_is_disabled():
+    ring = sb.Scrollback(size=0)
+    ring.append(b"abc")
+
+    assert ring.snapshot() == b""
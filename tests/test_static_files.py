@@ -0,0 +1,159 @@
+import gzip
+import os
+import types
+
+from libraries.microdot.microdot import NoCaseDict
+from src.static_files import StaticFiles
+
+STATIC = os.path.join(os.path.dirname(__file__), '..', 'static') + os.sep
+
+
+def _req(headers: dict = None, args: dict = None):
+    return types.SimpleNamespace(headers=NoCaseDict(headers or {}), args=args or {})
+
+
+def _folder(tmp_path) -> str:
+    (tmp_path / 'app.js').write_bytes(b'console.log(1);\n' * 100)
+    (tmp_path / 'app.js.gz').write_bytes(gzip.compress(b'console.log(1);\n' * 100))
+    (tmp_path / 'logo.jpg').write_bytes(b'\xff\xd8' + bytes(500))
+    return str(tmp_path) + os.sep
+
+
+def _body(res) -> bytes:
+    data = res.body.read()
+    res.body.close()
+    return data
+
+
+def test_gzip_sibling_served_only_when_accepted(tmp_path):
+    files = StaticFiles(_folder(tmp_path))
+
+    plain = files.response(_req(), 'app.js')
+    zipped = files.response(_req({'Accept-Encoding': 'gzip, deflate, br'}), 'app.js')
+    refused = files.response(_req({'Accept-Encoding': 'gzip;q=0, br'}), 'app.js')
+
+    assert 'Content-Encoding' not in plain.headers
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert zipped.headers['Content-Type'].startswith('application/javascript')
+    assert zipped.headers['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(_body(zipped)) == _body(plain)
+    assert int(zipped.headers['Content-Length']) < int(plain.headers['Content-Length'])
+    assert 'Content-Encoding' not in refused.headers
+    _body(refused)
+    assert zipped.headers['ETag'] != plain.headers['ETag']
+
+
+def test_etag_revalidation_and_hashed_max_age(tmp_path):
+    files = StaticFiles(_folder(tmp_path), hashed_max_age=3600)
+
+    first = files.response(_req(), 'logo.jpg')
+    etag = first.headers['ETag']
+    _body(first)
+    assert first.headers['Cache-Control'] == 'max-age=0'
+    assert 'Vary' not in first.headers
+
+    again = files.response(_req({'If-None-Match': etag}), 'logo.jpg')
+    assert again.status_code == 304
+    assert again.body == b''
+    assert again.headers['ETag'] == etag
+
+    url = files.url('logo.jpg')
+    digest = url.split('?v=')[1]
+    assert url == '/static/logo.jpg?v=' + digest
+    assert etag == f'"{digest}"'
+
+    hashed = files.response(_req(args={'v': digest}), 'logo.jpg')
+    _body(hashed)
+    assert hashed.headers['Cache-Control'] == 'max-age=3600, immutable'
+    assert files.get_stats() == {'files': 1, 'sent': 2, 'sent_gzip': 0, 'not_modified': 1}
+
+
+def test_changed_file_gets_new_etag(tmp_path):
+    folder = _folder(tmp_path)
+    files = StaticFiles(folder)
+    before = files.url('logo.jpg')
+
+    (tmp_path / 'logo.jpg').write_bytes(b'\xff\xd8' + bytes(501))
+    after = files.url('logo.jpg')
+    res = files.response(_req({'If-None-Match': '"' + before.split('?v=')[1] + '"'}), 'logo.jpg')
+    _body(res)
+
+    assert before != after
+    assert res.status_code == 200
+
+
+def test_stale_or_replaced_gzip_sibling_is_not_served(tmp_path):
+    folder = _folder(tmp_path)
+    files = StaticFiles(folder)
+    gzip_req = _req({'Accept-Encoding': 'gzip'})
+    _body(files.response(gzip_req, 'app.js'))
+
+    # source edited, .gz left behind: serve the new bytes uncompressed
+    (tmp_path / 'app.js').write_bytes(b'console.log(2);\n' * 100)
+    os.utime(tmp_path / 'app.js', (2000000000, 2000000000))
+    digest = files.url('app.js').split('?v=')[1]
+    res = files.response(_req({'Accept-Encoding': 'gzip'}, {'v': digest}), 'app.js')
+    assert 'Content-Encoding' not in res.headers
+    assert _body(res) == b'console.log(2);\n' * 100
+
+    # .gz regenerated: picked up without the source changing again
+    (tmp_path / 'app.js.gz').write_bytes(gzip.compress(b'console.log(2);\n' * 100))
+    os.utime(tmp_path / 'app.js.gz', (2000000001, 2000000001))
+    res = files.response(gzip_req, 'app.js')
+    assert res.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(_body(res)) == b'console.log(2);\n' * 100
+
+    # .gz deleted
+    os.remove(tmp_path / 'app.js.gz')
+    res = files.response(gzip_req, 'app.js')
+    assert 'Content-Encoding' not in res.headers and 'Vary' not in res.headers
+    _body(res)
+
+
+def test_missing_and_traversal_are_not_found(tmp_path):
+    files = StaticFiles(_folder(tmp_path))
+
+    assert files.response(_req(), 'nope.css') == ('Not found', 404)
+    assert files.response(_req(), '../secret') == ('Not found', 404)
+    assert files.url('nope.css') == '/static/nope.css'
+
+
+def test_shipped_gzip_siblings_match_sources():
+    # a stale .gz would be served in place of the edited file
+    for name in os.listdir(STATIC):
+        if name.endswith('.gz'):
+            with open(STATIC + name, 'rb') as gz, open(STATIC + name[:-3], 'rb') as src:
+                assert gzip.decompress(gz.read()) == src.read(), name
+
+
+def test_benchmark_page_load_bytes():
+    files = StaticFiles(STATIC)
+    assets = ['app.js', 'styles.css', 'favicon.ico', 'picobridge.jpg']
+    browser = {'Accept-Encoding': 'gzip, deflate'}
+
+    def load(etags: dict) -> tuple:
+        sent = 0
+        for name in assets:
+            headers = dict(browser)
+            if name in etags:
+                headers['If-None-Match'] = etags[name]
+            res = files.response(_req(headers), name)
+            etags[name] = res.headers['ETag']
+            if res.status_code == 200:
+                sent += int(res.headers['Content-Length'])
+                _body(res)
+        return sent
+
+    raw = sum(os.stat(STATIC + name)[6] for name in assets)
+    etags = {}
+    cold = load(etags)
+    warm = load(etags)
+
+    print()
+    print(f"{'page load':<22}{'body bytes':>12}")
+    print(f"{'uncompressed':<22}{raw:>12}")
+    print(f"{'cold, gzip':<22}{cold:>12}")
+    print(f"{'revalidated (304)':<22}{warm:>12}")
+
+    assert cold < raw
+    assert warm == 0
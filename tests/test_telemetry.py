@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+import pytest
+
+import src.telemetry as tm
+
+
+@pytest.fixture(autouse=True)
+def micropython_ticks(monkeypatch):
+    monkeypatch.setattr(tm.time, "ticks_ms", lambda: int(time.monotonic() * 1000), raising=False)
+    monkeypatch.setattr(tm.time, "ticks_diff", lambda a, b: a - b, raising=False)
+
+
+class FakeManager:
+    def __init__(self, topics=()) -> None:
+        self.topics = set(topics)
+        self.messages = []
+
+    def has_subscribers(self, topic: str) -> bool:
+        return topic in self.topics
+
+    async def broadcast_parts(self, parts: dict) -> None:
+        self.messages.append(parts)
+
+
+class Producers:
+    def __init__(self) -> None:
+        self.calls = {'activity': 0, 'throughput': 0, 'system': 0}
+
+    def activity(self) -> dict:
+        self.calls['activity'] += 1
+        return {'rx': True, 'tx': False}
+
+    async def throughput(self) -> dict:
+        self.calls['throughput'] += 1
+        return {'rx_bps': 1, 'tx_bps': 2}
+
+    def system(self) -> dict:
+        self.calls['system'] += 1
+        return {'mem_free': 3, 'mem_alloc': 4}
+
+
+def _run(manager, producers, seconds: float, notify_every: float = 0, **rates):
+    async def run():
+        scheduler = tm.TelemetryScheduler(manager, producers.activity, producers.throughput,
+                                          producers.system, **rates)
+        task = asyncio.create_task(scheduler.run())
+        t0 = time.monotonic()
+        while time.monotonic() - t0 < seconds:
+            if notify_every:
+                scheduler.notify()
+            await asyncio.sleep(notify_every or seconds)
+        task.cancel()
+        return scheduler.get_stats()
+
+    return asyncio.run(run())
+
+
+def test_idle_without_subscribers_only_refreshes_rates():
+    manager, producers = FakeManager(), Producers()
+    stats = _run(manager, producers, 0.25, notify_every=0.005,
+                 activity_ms=10, throughput_ms=100, system_ms=100)
+
+    assert manager.messages == []
+    assert producers.calls['activity'] == producers.calls['system'] == 0
+    # the display still gets its rates
+    assert producers.calls['throughput'] == 2
+    assert stats['wakeups'] == 2
+
+
+def test_due_parts_share_one_message():
+    manager = FakeManager({'activity', 'throughput', 'system'})
+    producers = Producers()
+    _run(manager, producers, 0.13, activity_ms=10, throughput_ms=100, system_ms=100)
+
+    assert manager.messages == [{
+        'throughput': {'rx_bps': 1, 'tx_bps': 2},
+        'system': {'mem_free': 3, 'mem_alloc': 4}
+    }]
+
+
+def test_activity_is_rate_limited():
+    manager, producers = FakeManager({'activity'}), Producers()
+    _run(manager, producers, 0.2, notify_every=0.002,
+         activity_ms=40, throughput_ms=1000, system_ms=1000)
+
+    # ~100 notifications, at most one report per 40 ms
+    assert 3 <= producers.calls['activity'] <= 6
+    assert all(list(m) == ['activity'] for m in manager.messages)
+
+
+def test_benchmark_wakeups_per_second():
+    # periods scaled down 10x from the defaults (50 ms / 1 s / 1 s)
+    activity_ms, period_ms, seconds = 5, 100, 0.3
+
+    def legacy(notify_every: float, topics) -> float:
+        # the three loops being replaced, each on its own timer
+        wakeups = [0]
+
+        async def loop(period_s: float):
+            while True:
+                await asyncio.sleep(period_s)
+                wakeups[0] += 1
+
+        async def run():
+            tasks = [asyncio.create_task(loop(p / 1000)) for p in (activity_ms, period_ms, period_ms)]
+            await asyncio.sleep(seconds)
+            for t in tasks:
+                t.cancel()
+
+        asyncio.run(run())
+        return wakeups[0] / seconds
+
+    def scheduler(notify_every: float, topics) -> float:
+        stats = _run(FakeManager(topics), Producers(), seconds, notify_every=notify_every,
+                     activity_ms=activity_ms, throughput_ms=period_ms, system_ms=period_ms)
+        return stats['wakeups'] / seconds
+
+    scenarios = {
+        'no browser, UART busy': (0.001, ()),
+        'browser, UART idle': (0, ('activity', 'throughput', 'system')),
+        'browser, UART busy': (0.001, ('activity', 'throughput', 'system')),
+    }
+
+    print()
+    print(f"  {'scenario':<22} {'legacy/s':>9} {'unified/s':>10}")
+    results = {}
+    for name, (notify_every, topics) in scenarios.items():
+        results[name] = legacy(notify_every, topics), scheduler(notify_every, topics)
+        print(f"  {name:<22} {results[name][0]:>9.0f} {results[name][1]:>10.0f}")
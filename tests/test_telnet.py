@@ -0,0 +1,122 @@
+import time
+
+import src.telnet as tn
+
+
+def _legacy_negotiation(buf: bytes) -> tuple:
+    # stateless per-byte implementation this parser replaced, kept for the benchmark
+    out, resp = bytearray(), bytearray()
+    i, n = 0, len(buf)
+    while i < n:
+        b = buf[i]
+        if b != tn.IAC:
+            out.append(b)
+            i += 1
+            continue
+        if i + 1 >= n:
+            break
+        cmd = buf[i + 1]
+        if cmd in (tn.DO, tn.DONT, tn.WILL, tn.WONT):
+            if i + 2 >= n:
+                break
+            opt = buf[i + 2]
+            if cmd == tn.DO:
+                resp += bytes([tn.IAC, tn.WONT, opt])
+            elif cmd == tn.WILL:
+                resp += bytes([tn.IAC, tn.DONT, opt])
+            i += 3
+        elif cmd == tn.SB:
+            i += 2
+            while i < n - 1 and not (buf[i] == tn.IAC and buf[i + 1] == tn.SE):
+                i += 1
+            i += 2 if i < n - 1 else 0
+        elif cmd == tn.IAC:
+            out.append(tn.IAC)
+            i += 2
+        else:
+            i += 2
+    return bytes(out), bytes(resp)
+
+
+def test_plain_data_passes_through_untouched():
+    buf = b"show running-config\r\n"
+    out, resp = tn.TelnetParser().feed(buf)
+
+    assert out is buf
+    assert resp == b""
+
+
+def test_negotiation_replies():
+    out, resp = tn.TelnetParser().feed(bytes([tn.IAC, tn.DO, 1, 65, tn.IAC, tn.WILL, 3, 66]))
+
+    assert out == b"AB"
+    assert resp == bytes([tn.IAC, tn.WONT, 1, tn.IAC, tn.DONT, 3])
+
+
+def test_escaped_iac_and_subnegotiation_are_handled():
+    buf = b"a" + bytes([tn.IAC, tn.IAC]) + b"b" + bytes([tn.IAC, tn.SB, 24, 0, tn.IAC, tn.IAC, 1, tn.IAC, tn.SE]) + b"c"
+    out, resp = tn.TelnetParser().feed(buf)
+
+    assert out == b"a\xffbc"
+    assert resp == b""
+
+
+def test_sequences_split_at_every_offset():
+    stream = (b"conf t\r" + bytes([tn.IAC, tn.DO, 1]) + b"hostname R1\r"
+              + bytes([tn.IAC, tn.SB, 31, 0, 80, 0, 24, tn.IAC, tn.SE])
+              + bytes([tn.IAC, tn.IAC]) + b"end\r" + bytes([tn.IAC, tn.WILL, 3]))
+    expected = (b"conf t\rhostname R1\r\xffend\r", bytes([tn.IAC, tn.WONT, 1, tn.IAC, tn.DONT, 3]))
+
+    for cut in range(1, len(stream)):
+        parser = tn.TelnetParser()
+        out1, resp1 = parser.feed(stream[:cut])
+        out2, resp2 = parser.feed(stream[cut:])
+        assert (out1 + out2, resp1 + resp2) == expected, cut
+
+
+def test_one_byte_chunks():
+    stream = bytes([tn.IAC, tn.DO, 34]) + b"ok" + bytes([tn.IAC, tn.SB, 34, 1, 0, tn.IAC, tn.SE]) + b"!"
+    parser = tn.TelnetParser()
+    out, resp = bytearray(), bytearray()
+    for b in stream:
+        o, r = parser.feed(bytes([b]))
+        out += o
+        resp += r
+
+    assert out == b"ok!"
+    assert resp == bytes([tn.IAC, tn.WONT, 34])
+
+
+def test_escape_fast_path_and_doubling():
+    plain = b"Router#"
+    assert tn.telnet_escape(plain) is plain
+    assert tn.telnet_escape(b"a\xffb\xff") == b"a\xff\xffb\xff\xff"
+
+    # round-trips through the inbound parser
+    out, _ = tn.TelnetParser().feed(tn.telnet_escape(bytes(range(256))))
+    assert out == bytes(range(256))
+
+
+def test_benchmark_large_paste():
+    line = b"interface GigabitEthernet0/1\r description uplink to core\r"
+    plain = line * 1200  # ~64 KB
+    with_iac = (line * 15 + bytes([tn.IAC, tn.IAC]) + bytes([tn.IAC, tn.DO, 1])) * 80
+    chunk = 256
+
+    def run(fn, data: bytes) -> float:
+        t0 = time.perf_counter()
+        for i in range(0, len(data), chunk):
+            fn(data[i:i + chunk])
+        return len(data) / (time.perf_counter() - t0) / 1e6
+
+    def legacy(buf: bytes) -> tuple:
+        # client_to_uart only called the old parser when an IAC was present
+        return _legacy_negotiation(buf) if b'\xff' in buf else (buf, b'')
+
+    print()
+    print(f"  {'MB/s':<10} {'legacy':>8} {'parser':>8}")
+    results = {}
+    for name, data in (("no IAC", plain), ("with IAC", with_iac)):
+        parser = tn.TelnetParser()
+        results[name] = run(legacy, data), run(parser.feed, data)
+        print(f"  {name:<10} {results[name][0]:>8.2f} {results[name][1]:>8.2f}")
@@ -0,0 +1,110 @@
+import asyncio
+
+import src.telnet_client as tc
+
+
+class FakeWriter:
+    def __init__(self, drain_s: float = 0) -> None:
+        self.data = bytearray()
+        self.writes = 0
+        self.closed = False
+        self._drain_s = drain_s
+
+    def write(self, data) -> None:
+        self.data += data
+        self.writes += 1
+
+    async def drain(self) -> None:
+        await asyncio.sleep(self._drain_s)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_enqueue_copies_and_delivers_in_order():
+    async def run():
+        writer = FakeWriter()
+        client = tc.TelnetClient(writer)
+        client.start()
+
+        ring = bytearray(b"abc")
+        client.enqueue(memoryview(ring))
+        ring[:] = b"xyz"  # ring slot reused before the writer task runs
+        client.enqueue(b"def")
+        await asyncio.sleep(0.05)
+
+        client.close()
+        return writer, client.get_stats()
+
+    writer, stats = asyncio.run(run())
+    assert bytes(writer.data) == b"abcdef"
+    # both chunks landed inside the coalescing window: one socket write
+    assert stats == {'queued': 6, 'sent': 6, 'dropped': 0, 'depth': 0, 'writes': 1}
+
+
+def test_slow_client_drops_without_blocking_enqueue():
+    async def run():
+        slow = tc.TelnetClient(FakeWriter(drain_s=0.05), max_queue_bytes=100, coalesce_ms=0)
+        fast_writer = FakeWriter()
+        fast = tc.TelnetClient(fast_writer, max_queue_bytes=100, coalesce_ms=0)
+        slow.start()
+        fast.start()
+
+        for _ in range(10):
+            for client in (slow, fast):
+                assert client.enqueue(b"x" * 40)
+            await asyncio.sleep(0.001)
+
+        stats = slow.get_stats(), fast.get_stats()
+        slow.close()
+        fast.close()
+        return stats, fast_writer
+
+    (slow_stats, fast_stats), fast_writer = asyncio.run(run())
+    assert slow_stats['dropped'] > 0
+    assert slow_stats['depth'] <= 100
+    assert fast_stats['dropped'] == 0
+    assert len(fast_writer.data) == 400
+
+
+def test_disconnect_policy_closes_laggard():
+    async def run():
+        writer = FakeWriter(drain_s=1)
+        client = tc.TelnetClient(writer, max_queue_bytes=100, overflow=tc.OVERFLOW_DISCONNECT)
+        client.start()
+
+        assert client.enqueue(b"x" * 40)
+        await asyncio.sleep(0)
+        assert client.enqueue(b"x" * 40)
+        assert not client.enqueue(b"x" * 40)
+        return writer, client
+
+    writer, client = asyncio.run(run())
+    assert writer.closed
+    assert not client.enqueue(b"x")
+
+
+def test_coalescing_budget_and_byte_threshold():
+    async def run():
+        writer = FakeWriter()
+        client = tc.TelnetClient(writer, coalesce_ms=100, coalesce_bytes=64)
+        client.start()
+
+        for _ in range(5):
+            client.enqueue(b"Rtr#")
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0.15)
+        small_writes = writer.writes
+
+        # crossing coalesce_bytes flushes without waiting out the budget
+        client.enqueue(b"y" * 64)
+        await asyncio.sleep(0.005)
+        big_writes = writer.writes
+
+        client.close()
+        return small_writes, big_writes, writer
+
+    small_writes, big_writes, writer = asyncio.run(run())
+    assert small_writes == 1
+    assert big_writes == 2
+    assert bytes(writer.data) == b"Rtr#" * 5 + b"y" * 64
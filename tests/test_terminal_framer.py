@@ -44,7 +44,7 @@ def test_pager_token_emitted_immediately(monkeypatch):
     # "prefix" should be emitted as a line (newline inserted), then token on its own line
     assert frames == ["prefix\n", "Username:\n"]
     # remainder ("rest") stays in accumulator until newline/idle
-    assert fr._line_accum.startswith("rest")
+    assert fr.get_partial().startswith("rest")
 
 
 def test_utf8_split_across_chunks(monkeypatch):
@@ -76,7 +76,7 @@ def test_flush_idle_emits_partial_after_timeout(monkeypatch):
     flushed = fr.flush_idle()
     assert flushed == ["partial"]
     # accumulator cleared after flush
-    assert fr._line_accum == ""
+    assert fr.get_partial() == ""
 
 
 def test_process_multiple_operations(monkeypatch):
@@ -89,3 +89,148 @@ def test_process_multiple_operations(monkeypatch):
     # Expect lines 'one\n', 'two\n', then '--More--\n' and 'prompt\n' (before token)
     # Note: depending on token placement this checks token behavior and ordering
     assert "--More--\n" in frames
+
+
+def test_has_partial_tracks_unterminated_text(monkeypatch):
+    state = setup_time(monkeypatch)
+    fr = tf.TerminalFramer(idle_flush_ms=50)
+
+    fr.process_chunk(b"line\n")
+    assert not fr.has_partial()
+
+    fr.process_chunk(b"Router#")
+    assert fr.has_partial()
+    assert fr.get_idle_flush_ms() == 50
+
+
+def test_memoryview_chunks_keep_only_utf8_tail(monkeypatch):
+    state = setup_time(monkeypatch)
+    fr = tf.TerminalFramer(idle_flush_ms=50)
+    ring = bytearray(b"ok \xe2\x9c")
+
+    assert fr.process_chunk(memoryview(ring)) == []
+    # the ring slot gets overwritten; the tail must have been copied out
+    ring[:] = b"\x93\n\x00\x00\x00"
+    assert fr.process_chunk(memoryview(ring)[:2]) == ["ok ✓\n"]
+
+
+def test_flush_emits_partial_immediately(monkeypatch):
+    state = setup_time(monkeypatch)
+    fr = tf.TerminalFramer(idle_flush_ms=50)
+
+    fr.process_chunk(b"Router#")
+    assert fr.flush() == ["Router#"]
+    assert fr.flush() == []
+
+
+def test_token_split_across_chunks(monkeypatch):
+    state = setup_time(monkeypatch)
+    fr = tf.TerminalFramer(idle_flush_ms=50)
+
+    assert fr.process_chunk(b"line\n --Mo") == ["line\n"]
+    assert fr.process_chunk(b"re-- tail") == [" \n", "--More--\n"]
+    assert fr.get_partial() == " tail"
+
+
+def test_long_partial_line_over_many_chunks(monkeypatch):
+    state = setup_time(monkeypatch)
+    fr = tf.TerminalFramer(idle_flush_ms=50)
+
+    for _ in range(100):
+        assert fr.process_chunk(b"....") == []
+
+    assert fr.process_chunk(b"done\n") == ["." * 400 + "done\n"]
+    assert not fr.has_partial()
+
+
+class LegacyFramer(tf.TerminalFramer):
+    """The original accumulate-and-reslice framing, kept as a reference."""
+    def __init__(self, flush_tokens=None, **kwargs) -> None:
+        super().__init__(flush_tokens=flush_tokens, **kwargs)
+        self._tokens = flush_tokens or tf.DEFAULT_FLUSH_TOKENS
+        self._line_accum = ''
+
+    def _find_token(self, text: str, start: int) -> tuple:
+        first_idx, first_tok = -1, None
+        for tok in self._tokens:
+            idx = text.find(tok, start)
+            if idx != -1 and (first_idx == -1 or idx < first_idx):
+                first_idx, first_tok = idx, tok
+        return first_idx, first_tok
+
+    def _frames_from_text(self, s: str) -> list:
+        frames = []
+        s = tf.normalize_newlines(tf.apply_backspaces(s))
+        self._line_accum += s
+        while True:
+            nl = self._line_accum.find('\n')
+            if nl == -1:
+                break
+            frames.append(self._line_accum[:nl + 1])
+            self._line_accum = self._line_accum[nl + 1:]
+        while self._line_accum:
+            idx, tok = self._find_token(self._line_accum, 0)
+            if tok is None:
+                break
+            before = self._line_accum[:idx]
+            if before:
+                frames.append(before + '\n')
+            frames.append(tok + '\n')
+            self._line_accum = self._line_accum[idx + len(tok):]
+        return frames
+
+
+def test_matches_legacy_framing_on_random_chunking(monkeypatch):
+    import random
+
+    state = setup_time(monkeypatch)
+    rnd = random.Random(42)
+    pieces = ["Router#", "show ver\r\n", "--More--", " ", "\b", "Username:", "login:",
+              "Password:", "x" * 30, "\n", "\r", "abc\r\ndef"]
+    stream = "".join(rnd.choice(pieces) for _ in range(3000)).encode()
+
+    for _ in range(20):
+        new, old = tf.TerminalFramer(), LegacyFramer()
+        out_new, out_old = [], []
+        i = 0
+        while i < len(stream):
+            n = rnd.randint(1, 300)
+            out_new += new.process_chunk(stream[i:i + n])
+            out_old += old.process_chunk(stream[i:i + n])
+            i += n
+
+        assert out_new == out_old
+        assert new.get_partial() == old._line_accum
+
+
+def test_benchmark_linear_scaling(monkeypatch):
+    import time
+
+    state = setup_time(monkeypatch)
+    line = b"GigabitEthernet1/0/1   unassigned  YES unset  administratively down down\r\n"
+
+    def per_kb_us(framer_cls, size: int) -> float:
+        burst = (line * (size // len(line) + 1))[:size]
+        reps = max(1, (64 * 1024) // size)
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            framer_cls().process_chunk(burst)
+        return (time.perf_counter() - t0) / reps / (size / 1024) * 1e6
+
+    print()
+    print(f"  {'burst':>7} {'legacy us/KB':>13} {'framer us/KB':>13}")
+    results = {}
+    for size in (1024, 16 * 1024, 64 * 1024, 256 * 1024):
+        results[size] = per_kb_us(LegacyFramer, size), per_kb_us(tf.TerminalFramer, size)
+        print(f"  {size // 1024:>5}KB {results[size][0]:>13.1f} {results[size][1]:>13.1f}")
+
+
+def test_custom_prompt_profile_flushes_without_idle_wait(monkeypatch):
+    state = setup_time(monkeypatch)
+    fr = tf.TerminalFramer(idle_flush_ms=50, flush_tokens=['Router#', '[confirm]'])
+
+    assert fr.process_chunk(b"copy run start\r\nDestination filename [startup-config]? \r\n[conf") == [
+        "copy run start\n", "Destination filename [startup-config]? \n"]
+    assert fr.process_chunk(b"irm]") == ["[confirm]\n"]
+    assert fr.process_chunk(b"\r\nRouter#") == ["\n", "Router#\n"]
+    assert not fr.has_partial()
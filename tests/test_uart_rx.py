@@ -0,0 +1,203 @@
+import asyncio
+import random
+import time
+import tracemalloc
+
+import src.uart_rx as ur
+
+
+class FakeUart:
+    def __init__(self) -> None:
+        self.buf = bytearray()
+        self.readable = asyncio.Event()
+        self.arrivals = []
+
+    def feed(self, data: bytes) -> None:
+        self.buf += data
+        self.arrivals.append(time.perf_counter())
+        self.readable.set()
+
+    def any(self) -> int:
+        return len(self.buf)
+
+    def read(self, n: int) -> bytes:
+        data = bytes(self.buf[:n])
+        del self.buf[:n]
+        if not self.buf:
+            self.readable.clear()
+        return data
+
+    def readinto(self, mv) -> int:
+        n = min(len(mv), len(self.buf))
+        mv[:n] = self.buf[:n]
+        del self.buf[:n]
+        if not self.buf:
+            self.readable.clear()
+        return n
+
+
+class FakeStream:
+    """Mimics MicroPython's StreamReader.read(0): wait for readable, read nothing."""
+    def __init__(self, uart: FakeUart) -> None:
+        self._uart = uart
+
+    async def read(self, n: int) -> bytes:
+        await self._uart.readable.wait()
+        return b''
+
+
+def test_read_returns_all_pending_bytes():
+    async def run():
+        uart = FakeUart()
+        reader = ur.UartReader(uart, stream=FakeStream(uart))
+        uart.feed(b"Router>")
+        uart.feed(b"\r\n")
+        return bytes(await reader.read())
+
+    assert asyncio.run(run()) == b"Router>\r\n"
+
+
+def test_read_returns_views_into_preallocated_ring():
+    async def run():
+        uart = FakeUart()
+        reader = ur.UartReader(uart, buffer_size=16, stream=FakeStream(uart))
+
+        uart.feed(b"0123456789")
+        first = await reader.read()
+        assert isinstance(first, memoryview)
+        assert bytes(first) == b"0123456789"
+
+        # does not fit in the 6 bytes left: wraps to the start of the ring
+        uart.feed(b"abcdefgh")
+        second = await reader.read()
+        assert bytes(second) == b"abcdefgh"
+        assert second.obj is first.obj
+
+        # larger than the ring: delivered in ring-sized pieces
+        uart.feed(b"x" * 40)
+        sizes = [len(await reader.read()) for _ in range(3)]
+        assert sizes == [16, 16, 8]
+
+    asyncio.run(run())
+
+
+def test_read_waits_until_data_arrives():
+    async def run():
+        uart = FakeUart()
+        reader = ur.UartReader(uart, stream=FakeStream(uart))
+        task = asyncio.create_task(reader.read())
+        await asyncio.sleep(0.01)
+        assert not task.done()
+        uart.feed(b"login:")
+        return bytes(await task)
+
+    assert asyncio.run(run()) == b"login:"
+
+
+def _percentile(values: list, p: int) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, (len(values) * p) // 100)]
+
+
+async def _measure(uart: FakeUart, rx_task, samples: int) -> list:
+    latencies = []
+    received = []
+    task = asyncio.create_task(rx_task(received))
+    rnd = random.Random(1234)
+
+    for _ in range(samples):
+        await asyncio.sleep(rnd.uniform(0.005, 0.06))
+        uart.feed(b"Router#")
+        while not received:
+            await asyncio.sleep(0)
+        latencies.append((received.pop() - uart.arrivals[-1]) * 1000)
+
+    task.cancel()
+    return latencies
+
+
+def test_benchmark_rx_latency_poll_vs_event():
+    samples = 20
+
+    async def legacy():
+        uart = FakeUart()
+
+        async def rx(received):
+            while True:
+                if uart.any():
+                    uart.read(uart.any())
+                    received.append(time.perf_counter())
+                else:
+                    await asyncio.sleep(0.05)
+
+        return await _measure(uart, rx, samples)
+
+    async def event():
+        uart = FakeUart()
+        reader = ur.UartReader(uart, stream=FakeStream(uart))
+
+        async def rx(received):
+            while True:
+                await reader.read()
+                received.append(time.perf_counter())
+
+        return await _measure(uart, rx, samples)
+
+    before = asyncio.run(legacy())
+    after = asyncio.run(event())
+
+    print()
+    print(f"  {'RX latency ms':<14} {'p50':>7} {'p90':>7} {'max':>7}")
+    for name, lat in (("poll 50 ms", before), ("event", after)):
+        print(f"  {name:<14} {_percentile(lat, 50):>7.2f} {_percentile(lat, 90):>7.2f} {max(lat):>7.2f}")
+
+
+def _read_now(reader) -> memoryview:
+    # drive the coroutine by hand: with bytes pending it never suspends
+    coro = reader.read()
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value
+    raise AssertionError("reader suspended with data pending")
+
+
+def test_benchmark_rx_allocations_read_vs_readinto(monkeypatch):
+    import src.terminal_framer as tf
+
+    monkeypatch.setattr(tf.time, "ticks_ms", lambda: 0, raising=False)
+    chunk = (b"GigabitEthernet0/1     10.0.0.1   YES NVRAM  up   up\r\n" * 10)[:512]
+    iterations = 200
+
+    def measure(step) -> int:
+        total = 0
+        tracemalloc.start()
+        for _ in range(iterations):
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            step()
+            _, peak = tracemalloc.get_traced_memory()
+            total += peak - base
+        tracemalloc.stop()
+        return total // iterations
+
+    uart = FakeUart()
+    framer = tf.TerminalFramer()
+    reader = ur.UartReader(uart, buffer_size=2048, stream=FakeStream(uart))
+
+    def legacy():
+        uart.buf += chunk
+        data = uart.read(uart.any())
+        framer.process_chunk(data)
+
+    def ring():
+        uart.buf += chunk
+        data = _read_now(reader)
+        framer.process_chunk(data)
+
+    before = measure(legacy)
+    after = measure(ring)
+
+    print()
+    print(f"  peak transient heap bytes per 512 B chunk: read()={before} readinto(ring)={after}")
+    assert after < before
@@ -0,0 +1,104 @@
+import asyncio
+
+import src.uart_tx as ut
+
+
+class FakeUart:
+    def __init__(self) -> None:
+        self.writes = []
+
+    def write(self, buf) -> int:
+        self.writes.append(bytes(buf))
+        return len(buf)
+
+
+def setup_clock(monkeypatch):
+    state = {'us': 0, 'sleeps': 0}
+
+    async def sleep(seconds):
+        state['us'] += int(seconds * 1_000_000)
+        state['sleeps'] += 1
+
+    monkeypatch.setattr(ut.asyncio, "sleep", sleep)
+
+    return state
+
+
+def make_tx(baudrate=9600, **kwargs):
+    uart = FakeUart()
+    tx = ut.UartTx(**kwargs)
+    tx.attach(uart, baudrate=baudrate)
+
+    return tx, uart
+
+
+def test_translate_crlf_enabled():
+    assert ut.translate_crlf(b"show run\r\n", True) == b"show run\r\r"
+    assert ut.translate_crlf(b"conf t\n", True) == b"conf t\r"
+
+
+def test_translate_crlf_disabled_drops_line_endings():
+    assert ut.translate_crlf(b"a\r\nb\rc\n", False) == b"abc"
+
+
+def test_char_time_accounts_for_frame_bits():
+    assert ut.frame_bits(8, None, 1) == 10
+    assert ut.frame_bits(7, 0, 2) == 11
+    assert ut.char_time_us(9600) == 1042
+    assert ut.char_time_us(115200) == 87
+
+
+def test_write_chunks_to_fifo_size(monkeypatch):
+    setup_clock(monkeypatch)
+    tx, uart = make_tx()
+
+    payload = bytes(range(100))
+    assert asyncio.run(tx.write(payload)) == 100
+    assert [len(w) for w in uart.writes] == [32, 32, 32, 4]
+    assert b''.join(uart.writes) == payload
+
+
+def test_write_splits_on_lines_with_inter_line_delay(monkeypatch):
+    clock = setup_clock(monkeypatch)
+    tx, uart = make_tx(inter_line_ms=20)
+
+    asyncio.run(tx.write(b"int gi0/1\rno shut\r"))
+    assert uart.writes == [b"int gi0/1\r", b"no shut\r"]
+    # two line delays on top of 18 characters of wire time
+    assert clock['us'] >= 2 * 20_000 + 18 * ut.char_time_us(9600) - 1000
+
+
+def test_inter_char_delay_writes_single_bytes(monkeypatch):
+    setup_clock(monkeypatch)
+    tx, uart = make_tx(inter_char_ms=2)
+
+    asyncio.run(tx.write(b"abc"))
+    assert uart.writes == [b"a", b"b", b"c"]
+
+
+def test_write_without_uart_is_noop():
+    tx = ut.UartTx()
+    assert asyncio.run(tx.write(b"abc")) == 0
+
+
+def test_benchmark_paced_throughput(monkeypatch):
+    payload = b"interface GigabitEthernet0/1\r description uplink\r" * 400  # ~20 KB
+
+    legacy_bps = int(1 / 0.005)  # old path: one byte per 5 ms sleep
+
+    print()
+    print(f"  {'baud':>7} {'line B/s':>9} {'engine B/s':>11} {'legacy B/s':>11} {'sleeps':>7}")
+    for baudrate in (9600, 115200):
+        clock = setup_clock(monkeypatch)
+        tx, uart = make_tx(baudrate=baudrate)
+
+        asyncio.run(tx.write(payload))
+
+        line_bps = baudrate // ut.frame_bits()
+        engine_bps = int(len(payload) * 1_000_000 / clock['us'])
+        print(f"  {baudrate:>7} {line_bps:>9} {engine_bps:>11} {legacy_bps:>11} {clock['sleeps']:>7}")
+
+        assert b''.join(uart.writes) == payload
+        # paced at (not above) the line rate, and far beyond the legacy cap
+        assert 0.95 * line_bps <= engine_bps <= line_bps
+        assert engine_bps > 4 * legacy_bps
@@ -0,0 +1,290 @@
+import asyncio
+import os
+import time
+import zlib
+
+from libraries.microdot import websocket as wsmod
+from libraries.microdot.websocket import WebSocket, WebSocketError
+
+SHOW_RUN = "".join(
+    f"interface GigabitEthernet0/{i}\n description uplink-{i}\n switchport mode trunk\n"
+    f" switchport trunk allowed vlan 10,20,30\n spanning-tree portfast\n!\n"
+    for i in range(48)
+)
+
+
+class FakeReader:
+    def __init__(self, data: bytes) -> None:
+        self._data = data
+
+    async def read(self, n: int) -> bytes:
+        out, self._data = self._data[:n], self._data[n:]
+        return out
+
+    async def readexactly(self, n: int) -> bytes:
+        return await self.read(n)
+
+
+class FakeRequest:
+    def __init__(self, headers: dict = None, data: bytes = b"") -> None:
+        self.headers = {
+            'Connection': 'Upgrade',
+            'Upgrade': 'websocket',
+            'Sec-WebSocket-Key': 'dGhlIHNhbXBsZSBub25jZQ==',
+            **(headers or {})
+        }
+        self.sock = (FakeReader(data), None)
+
+
+def _client_frame(payload: bytes, opcode: int = WebSocket.TEXT, rsv: int = 0, fin: bool = True) -> bytes:
+    # a masked client frame, as a browser would send it
+    mask = os.urandom(4)
+    header = bytearray([(0x80 if fin else 0) | rsv | opcode])
+    if len(payload) < 126:
+        header.append(0x80 | len(payload))
+    else:
+        header.append(0x80 | 126)
+        header.extend(len(payload).to_bytes(2, 'big'))
+    return bytes(header) + mask + wsmod._apply_mask(payload, mask)
+
+
+def _negotiate(offer: str, window_bits: int = 10) -> WebSocket:
+    WebSocket.deflate_window_bits = window_bits
+    try:
+        ws = WebSocket(FakeRequest({'Sec-WebSocket-Extensions': offer}))
+        ws._handshake_response()
+    finally:
+        WebSocket.deflate_window_bits = 0
+    return ws
+
+
+def _generator_unmask(payload: bytes, mask: bytes) -> bytes:
+    # the per-byte implementation _apply_mask replaced
+    return bytes(x ^ mask[i % 4] for i, x in enumerate(payload))
+
+
+def test_apply_mask_matches_per_byte_xor():
+    mask = b"\x37\xfa\x21\x3d"
+    for n in (0, 1, 3, 4, 5, 125, 126, 4096, 65537):
+        payload = os.urandom(n)
+        assert wsmod._apply_mask(payload, mask) == _generator_unmask(payload, mask)
+
+
+def test_apply_mask_keeps_leading_zero_bytes():
+    mask = b"\x01\x02\x03\x04"
+    payload = mask + b"abc"  # first word unmasks to zeros
+
+    assert wsmod._apply_mask(payload, mask) == b"\x00\x00\x00\x00" + _generator_unmask(b"abc", mask)
+
+
+def test_apply_mask_is_its_own_inverse():
+    mask = os.urandom(4)
+    payload = "conf t\rinterface Gi0/1\r".encode() * 50
+
+    assert wsmod._apply_mask(wsmod._apply_mask(payload, mask), mask) == payload
+
+
+def test_benchmark_unmask():
+    mask = os.urandom(4)
+
+    print()
+    print(f"  {'payload':>8} {'per-byte us':>12} {'word us':>9}")
+    for n in (64, 4096, 65536):
+        payload = os.urandom(n)
+        reps = max(3, 200_000 // n)
+
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            _generator_unmask(payload, mask)
+        before = (time.perf_counter() - t0) / reps * 1e6
+
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            wsmod._apply_mask(payload, mask)
+        after = (time.perf_counter() - t0) / reps * 1e6
+
+        print(f"  {n:>8} {before:>12.1f} {after:>9.1f}")
+
+
+def test_deflate_negotiation_bounds_both_windows():
+    ws = _negotiate("permessage-deflate; client_max_window_bits")
+    assert (ws.deflate_wbits, ws._inflate_wbits) == (10, 10)
+
+    ws = _negotiate("permessage-deflate; client_max_window_bits=9; server_max_window_bits=12")
+    assert (ws.deflate_wbits, ws._inflate_wbits) == (10, 9)
+
+
+def test_deflate_declined_without_client_window_or_when_disabled():
+    # the client would be free to use a 32KB window
+    assert _negotiate("permessage-deflate").deflate_wbits == 0
+    assert _negotiate("permessage-deflate; client_max_window_bits", window_bits=0).deflate_wbits == 0
+    assert _negotiate("x-webkit-deflate-frame").deflate_wbits == 0
+
+
+def test_deflate_falls_back_without_a_compressor(monkeypatch):
+    monkeypatch.setattr(wsmod, 'HAS_DEFLATE', False)
+    assert _negotiate("permessage-deflate; client_max_window_bits").deflate_wbits == 0
+
+
+def test_compressed_frame_sets_rsv1_and_round_trips():
+    frame = bytes(WebSocket.encode_frame(SHOW_RUN, deflate_wbits=10))
+    assert frame[0] == 0x80 | 0x40 | WebSocket.TEXT
+    assert frame[1] == 126
+    payload = frame[4:]
+
+    # what a browser does: append the sync-flush tail and inflate
+    assert zlib.decompressobj(-15).decompress(payload + b"\x00\x00\xff\xff") == SHOW_RUN.encode()
+
+    # short messages and control frames stay uncompressed
+    assert WebSocket.encode_frame("Rtr#", deflate_wbits=10)[0] == 0x80 | WebSocket.TEXT
+    assert WebSocket.encode_frame(b"x" * 200, WebSocket.PING, deflate_wbits=10)[0] == 0x80 | WebSocket.PING
+
+
+def test_read_frame_inflates_compressed_client_message():
+    compressed = zlib.compressobj(6, zlib.DEFLATED, -9)
+    payload = compressed.compress(SHOW_RUN.encode()) + compressed.flush(zlib.Z_SYNC_FLUSH)
+
+    ws = WebSocket(FakeRequest(data=_client_frame(payload[:-4], rsv=0x40)))
+    ws._inflate_wbits = 9
+    assert asyncio.run(ws.receive()) == SHOW_RUN
+
+    # a compressed message split in two is inflated once it is complete
+    half = len(payload) // 2
+    data = _client_frame(payload[:half], rsv=0x40, fin=False) + \
+        _client_frame(payload[half:-4], WebSocket.CONT)
+    ws = WebSocket(FakeRequest(data=data))
+    ws._inflate_wbits = 9
+    assert asyncio.run(ws.receive_fragment()) == (WebSocket.TEXT, SHOW_RUN.encode(), True)
+
+    # rsv1 without a negotiated extension is a protocol error
+    ws = WebSocket(FakeRequest(data=_client_frame(payload[:-4], rsv=0x40)))
+    try:
+        asyncio.run(ws.receive())
+        assert False, "expected WebSocketError"
+    except WebSocketError:
+        pass
+
+
+def test_read_frame_rejects_oversized_inflated_message():
+    bomb = zlib.compressobj(9, zlib.DEFLATED, -9)
+    payload = bomb.compress(b"\0" * 100_000) + bomb.flush(zlib.Z_SYNC_FLUSH)
+
+    ws = WebSocket(FakeRequest(data=_client_frame(payload[:-4], rsv=0x40)))
+    ws._inflate_wbits = 9
+    ws.max_message_length = 4096
+    try:
+        asyncio.run(ws.receive())
+        assert False, "expected WebSocketError"
+    except WebSocketError:
+        pass
+
+
+def _fragmented(payload: bytes, size: int, opcode: int = WebSocket.TEXT) -> bytes:
+    pieces = [payload[i:i + size] for i in range(0, len(payload), size)]
+    return b"".join(
+        _client_frame(p, opcode if i == 0 else WebSocket.CONT, fin=i == len(pieces) - 1)
+        for i, p in enumerate(pieces)
+    )
+
+
+def test_receive_reassembles_fragments_around_control_frames():
+    text = "snmp-server community ✓ RO\n".encode() * 10
+    data = _fragmented(text, 7)
+    # a ping arrives between the first and second fragment
+    first_len = len(_client_frame(text[:7], fin=False))
+    data = data[:first_len] + _client_frame(b"hb", WebSocket.PING) + data[first_len:]
+
+    class PongSock:
+        frames = []
+
+        async def awrite(self, frame) -> None:
+            self.frames.append(bytes(frame))
+
+    request = FakeRequest(data=data)
+    request.sock = (request.sock[0], PongSock())
+    ws = WebSocket(request)
+
+    assert asyncio.run(ws.receive()) == text.decode()
+    assert PongSock.frames == [bytes(WebSocket.encode_frame(b"hb", WebSocket.PONG))]
+
+
+def test_receive_fragment_streams_pieces_in_order():
+    payload = bytes([0x10]) + b"x" * 100
+    ws = WebSocket(FakeRequest(data=_fragmented(payload, 40, WebSocket.BINARY)))
+
+    async def run():
+        return [await ws.receive_fragment() for _ in range(3)]
+
+    assert asyncio.run(run()) == [
+        (WebSocket.BINARY, payload[:40], False),
+        (WebSocket.BINARY, payload[40:80], False),
+        (WebSocket.BINARY, payload[80:], True),
+    ]
+
+
+def test_fragmented_message_is_bounded():
+    ws = WebSocket(FakeRequest(data=_fragmented(b"y" * 300, 100)))
+    ws.max_message_length = 256
+    try:
+        asyncio.run(ws.receive())
+        assert False, "expected WebSocketError"
+    except WebSocketError:
+        pass
+
+    # streaming only bounds each frame
+    ws = WebSocket(FakeRequest(data=_fragmented(b"y" * 300, 100)))
+    ws.max_message_length = 256
+
+    async def run():
+        return [await ws.receive_fragment() for _ in range(3)]
+
+    assert sum(len(d) for _, d, _ in asyncio.run(run())) == 300
+
+
+def test_continuation_protocol_errors():
+    for data in (
+        _client_frame(b"orphan", WebSocket.CONT),
+        _client_frame(b"a", fin=False) + _client_frame(b"b"),
+    ):
+        try:
+            asyncio.run(WebSocket(FakeRequest(data=data)).receive())
+            assert False, "expected WebSocketError"
+        except WebSocketError:
+            pass
+
+
+def test_benchmark_deflate_ratio_and_cpu():
+    lines = SHOW_RUN.splitlines(keepends=True)
+    messages = {
+        'show run (48 ports)': SHOW_RUN,
+        'route table': "".join(
+            f"O    10.{i // 256}.{i % 256}.0/24 [110/2] via 10.0.0.{i % 8 + 1}, 00:12:{i % 60:02d}, Gi0/{i % 4}\n"
+            for i in range(200)
+        ),
+        'one screen (24 lines)': "".join(lines[:24]),
+        'keystroke echo': "c",
+    }
+
+    print()
+    print(f"  {'message':<22} {'wbits':>5} {'raw B':>7} {'wire B':>7} {'ratio':>6} {'+us/msg':>8}")
+    for name, text in messages.items():
+        for wbits in (9, 10, 12):
+            reps = 50
+            t0 = time.perf_counter()
+            for _ in range(reps):
+                plain = WebSocket.encode_frame(text)
+            before = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            for _ in range(reps):
+                packed = WebSocket.encode_frame(text, deflate_wbits=wbits)
+            after = time.perf_counter() - t0
+
+            cost = (after - before) / reps * 1e6
+            ratio = len(plain) / len(packed)
+            print(f"  {name:<22} {wbits:>5} {len(plain):>7} {len(packed):>7} {ratio:>6.1f} {cost:>8.1f}")
+
+            if len(text) >= WebSocket.deflate_min_length:
+                assert len(packed) < len(plain)
+            else:
+                assert packed == plain
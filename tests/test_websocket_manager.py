@@ -0,0 +1,366 @@
+import asyncio
+import json
+import time
+
+from libraries.microdot.websocket import WebSocket
+from src.websocket_manager import WebsocketManager
+from src.ws_protocol import BINARY_SUBPROTOCOL
+
+
+class FakeSock:
+    def __init__(self) -> None:
+        self.frames = []
+
+    async def awrite(self, data) -> None:
+        self.frames.append(data)
+
+
+class FakeRequest:
+    def __init__(self, headers: dict = None) -> None:
+        self.sock = (None, FakeSock())
+        self.headers = headers or {}
+
+
+def make_ws(subprotocol: str = None, deflate_wbits: int = 0) -> WebSocket:
+    ws = WebSocket(FakeRequest())
+    ws.subprotocol = subprotocol
+    ws.deflate_wbits = deflate_wbits
+    return ws
+
+
+def _reference_frame(opcode: int, payload: bytes) -> bytes:
+    frame = bytearray([0x80 | opcode])
+    if len(payload) < 126:
+        frame.append(len(payload))
+    elif len(payload) < (1 << 16):
+        frame.append(126)
+        frame.extend(len(payload).to_bytes(2, 'big'))
+    else:
+        frame.append(127)
+        frame.extend(len(payload).to_bytes(8, 'big'))
+    return bytes(frame + payload)
+
+
+def test_encode_frame_header_sizes():
+    for n in (0, 125, 126, 65535, 65536):
+        payload = b"x" * n
+        assert bytes(WebSocket.encode_frame(payload)) == _reference_frame(WebSocket.BINARY, payload)
+
+    assert bytes(WebSocket.encode_frame("✓")) == _reference_frame(WebSocket.TEXT, "✓".encode())
+
+
+async def _drain() -> None:
+    # let the per-socket sender tasks run
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_broadcast_shares_one_encoded_frame():
+    async def run():
+        manager = WebsocketManager()
+        sockets = [make_ws() for _ in range(3)]
+        for ws in sockets:
+            manager.register(ws)
+
+        await manager.broadcast({'output': ["a\n"]})
+        await manager.broadcast({'rx': True})
+        await _drain()
+        return sockets
+
+    sockets = asyncio.run(run())
+    first = sockets[0].request.sock[1].frames
+    assert len(first) == 2
+    for ws in sockets[1:]:
+        assert [f is g for f, g in zip(ws.request.sock[1].frames, first)] == [True, True]
+
+
+def test_broadcast_encodes_once_per_protocol():
+    async def run():
+        manager = WebsocketManager()
+        text_a, text_b, binary = make_ws(), make_ws(), make_ws(BINARY_SUBPROTOCOL)
+        for ws in (text_a, text_b, binary):
+            manager.register(ws)
+
+        await manager.broadcast({'rx_bps': 10, 'tx_bps': 20})
+        await _drain()
+        return [ws.request.sock[1].frames[0] for ws in (text_a, text_b, binary)]
+
+    a, b, binary = asyncio.run(run())
+    assert a is b
+    assert json.loads(bytes(a[2:])) == {'rx_bps': 10, 'tx_bps': 20}
+    assert binary[0] == 0x80 | WebSocket.BINARY
+    assert len(binary) == 2 + 9
+
+
+def test_broadcast_shares_deflated_frame_between_same_window_sockets():
+    async def run():
+        manager = WebsocketManager()
+        plain, deflate_a, deflate_b = make_ws(), make_ws(deflate_wbits=10), make_ws(deflate_wbits=10)
+        for ws in (plain, deflate_a, deflate_b):
+            manager.register(ws)
+
+        await manager.broadcast({'output': ["interface Gi0/1\n switchport mode trunk\n!\n" * 20]})
+        await _drain()
+        return [ws.request.sock[1].frames[0] for ws in (plain, deflate_a, deflate_b)]
+
+    plain, a, b = asyncio.run(run())
+    assert a is b
+    assert a[0] & 0x40 and not plain[0] & 0x40
+    assert len(a) < len(plain)
+
+
+def test_handshake_selects_offered_subprotocol(monkeypatch):
+    monkeypatch.setattr(WebSocket, "subprotocols", [BINARY_SUBPROTOCOL])
+    headers = {'Connection': 'Upgrade', 'Upgrade': 'websocket', 'Sec-WebSocket-Key': 'dGhlIHNhbXBsZSBub25jZQ=='}
+
+    plain = WebSocket(FakeRequest(headers))
+    assert plain._handshake_response() == b's3pPLMBiTxaQ9kYGzzhZRbK+xOo='
+    assert plain.subprotocol is None
+
+    ws = WebSocket(FakeRequest(dict(headers, **{'Sec-WebSocket-Protocol': 'chat, ' + BINARY_SUBPROTOCOL})))
+    ws._handshake_response()
+    assert ws.subprotocol == BINARY_SUBPROTOCOL
+
+
+def test_failed_socket_is_removed():
+    class BrokenSock(FakeSock):
+        async def awrite(self, data) -> None:
+            raise OSError(104)
+
+    async def run():
+        manager = WebsocketManager()
+        good, bad = make_ws(), make_ws()
+        bad.request.sock = (None, BrokenSock())
+        manager.register(bad)
+        manager.register(good)
+        await manager.broadcast({'rx': True})
+        await _drain()
+        return manager, good
+
+    manager, good = asyncio.run(run())
+    assert manager.get_client_count() == 1
+    assert len(good.request.sock[1].frames) == 1
+
+
+class StalledSock(FakeSock):
+    def __init__(self) -> None:
+        super().__init__()
+        self.closed = False
+
+    async def awrite(self, data) -> None:
+        await asyncio.sleep(10)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_stalled_socket_does_not_block_others_and_is_evicted():
+    async def run():
+        manager = WebsocketManager(max_queue_bytes=1000)
+        good, stalled = make_ws(), make_ws()
+        stalled.request.sock = (None, StalledSock())
+        manager.register(stalled)
+        manager.register(good)
+
+        data = {'output': ["x" * 200]}
+        for _ in range(4):
+            await manager.broadcast(data)
+            await _drain()
+
+        depths = [s['depth'] for s in manager.get_stats()]
+        for _ in range(4):
+            await manager.broadcast(data)
+            await _drain()
+
+        return manager, good, stalled, depths
+
+    manager, good, stalled, depths = asyncio.run(run())
+    assert max(depths) > 0
+    assert len(good.request.sock[1].frames) == 8
+    assert manager.get_client_count() == 1
+    assert stalled.request.sock[1].closed
+
+
+def test_topic_subscriptions_filter_broadcasts():
+    async def run():
+        manager = WebsocketManager()
+        dashboard, automation, everything = make_ws(), make_ws(), make_ws()
+        for ws in (dashboard, automation, everything):
+            manager.register(ws)
+
+        assert manager.subscribe(dashboard, ['system', 'throughput', 'bogus']) == ('throughput', 'system')
+        assert manager.subscribe(automation, ['output']) == ('output',)
+
+        await manager.broadcast({'output': ["Router#"]}, 'output')
+        await manager.broadcast({'mem_free': 1, 'mem_alloc': 2}, 'system')
+        await manager.broadcast({'rx': True, 'tx': False}, 'activity')
+        await _drain()
+        return manager, [len(ws.request.sock[1].frames) for ws in (dashboard, automation, everything)]
+
+    manager, counts = asyncio.run(run())
+    assert counts == [1, 1, 3]
+    assert manager.get_keepalive_stats()['subscribers'] == {'output': 2, 'activity': 1, 'throughput': 2, 'system': 2}
+
+
+def test_broadcast_parts_merges_subscribed_topics_per_socket():
+    async def run():
+        manager = WebsocketManager()
+        full_a, full_b, dashboard = make_ws(), make_ws(), make_ws()
+        for ws in (full_a, full_b, dashboard):
+            manager.register(ws)
+        manager.subscribe(dashboard, ['system'])
+
+        await manager.broadcast_parts({
+            'activity': {'rx': True, 'tx': False},
+            'throughput': {'rx_bps': 10, 'tx_bps': 0},
+        })
+        await manager.broadcast_parts({'system': {'mem_free': 1, 'mem_alloc': 2}})
+        await _drain()
+        return [ws.request.sock[1].frames for ws in (full_a, full_b, dashboard)]
+
+    a, b, dashboard = asyncio.run(run())
+    assert a[0] is b[0]
+    assert json.loads(bytes(a[0][2:])) == {'rx': True, 'tx': False, 'rx_bps': 10, 'tx_bps': 0}
+    assert len(a) == 2
+    # nothing it subscribes to in the first tick, so no message at all
+    assert len(dashboard) == 1
+    assert json.loads(bytes(dashboard[0][2:])) == {'mem_free': 1, 'mem_alloc': 2}
+
+
+def test_topic_without_subscribers_is_never_encoded(monkeypatch):
+    encoded = []
+    original = WebsocketManager._encode
+
+    def counting_encode(data, encoding):
+        encoded.append(data)
+        return original(data, encoding)
+
+    monkeypatch.setattr(WebsocketManager, '_encode', staticmethod(counting_encode))
+
+    async def run():
+        manager = WebsocketManager()
+        ws = make_ws()
+        manager.register(ws)
+        manager.subscribe(ws, ['output'])
+
+        await manager.broadcast({'rx_bps': 1, 'tx_bps': 2}, 'throughput')
+        has_throughput = manager.has_subscribers('throughput')
+
+        manager.unregister(ws)
+        return has_throughput, manager.has_subscribers('output')
+
+    assert asyncio.run(run()) == (False, False)
+    assert encoded == []
+
+
+class DeadSock(FakeSock):
+    def __init__(self) -> None:
+        super().__init__()
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_keepalive_reaps_silent_peer_and_keeps_responsive_one():
+    async def run():
+        manager = WebsocketManager(ping_interval_s=0.02, ping_timeout_s=0.02)
+        alive, dead = make_ws(), make_ws()
+        dead.request.sock = (None, DeadSock())
+
+        class PongingSock(FakeSock):
+            async def awrite(self, data) -> None:
+                await super().awrite(data)
+                if data[0] == 0x80 | WebSocket.PING:
+                    alive.received_frames += 1  # the browser answered with a pong
+
+        alive.request.sock = (None, PongingSock())
+        manager.register(alive)
+        manager.register(dead)
+        manager.start()
+
+        await asyncio.sleep(0.1)
+        return manager, alive, dead
+
+    manager, alive, dead = asyncio.run(run())
+    assert manager.get_client_count() == 1
+    assert dead.request.sock[1].closed
+    stats = manager.get_keepalive_stats()
+    assert stats['reaped'] == 1
+    assert stats['pings'] >= 3
+    assert bytes(alive.request.sock[1].frames[0]) == bytes([0x80 | WebSocket.PING, 0])
+
+
+def test_keepalive_spares_socket_whose_input_is_being_handled():
+    async def run():
+        manager = WebsocketManager(ping_interval_s=0.02, ping_timeout_s=0.02)
+        busy = make_ws()
+        manager.register(busy)
+        manager.start()
+
+        # a paste chunk that outlasts several ping rounds: pongs go unread
+        manager.begin_input(busy)
+        await asyncio.sleep(0.1)
+        survived = manager.get_client_count()
+        manager.end_input(busy)
+
+        # back to reading, still silent: now it is reaped
+        await asyncio.sleep(0.1)
+        return survived, manager
+
+    survived, manager = asyncio.run(run())
+    assert survived == 1
+    assert manager.get_client_count() == 0
+    assert manager.get_reaped_count() == 1
+
+
+def test_large_single_frame_is_not_evicted():
+    async def run():
+        manager = WebsocketManager(max_queue_bytes=100)
+        ws = make_ws()
+        manager.register(ws)
+        await manager.send(ws, "x" * 500)
+        await _drain()
+        return manager, ws
+
+    manager, ws = asyncio.run(run())
+    assert manager.get_client_count() == 1
+    assert len(ws.request.sock[1].frames) == 1
+
+
+def test_benchmark_broadcast_cost():
+    data = {'output': ["GigabitEthernet1/0/%d is up, line protocol is up\n" % i for i in range(20)]}
+    rounds = 300
+
+    async def legacy(sockets):
+        # previous behaviour: every socket re-encodes every payload
+        for ws in sockets:
+            await ws.send(json.dumps(data))
+
+    async def run(clients: int, broadcast) -> float:
+        manager = WebsocketManager(max_queue_bytes=1 << 20)
+        sockets = [make_ws() for _ in range(clients)]
+        for ws in sockets:
+            manager.register(ws)
+        await _drain()
+
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            if broadcast == "legacy":
+                await legacy(sockets)
+            else:
+                await manager.broadcast(data)
+        while any(st['depth'] for st in manager.get_stats()):
+            await asyncio.sleep(0)
+        return (time.perf_counter() - t0) / rounds * 1e6
+
+    def measure(clients: int, broadcast) -> float:
+        # best of three, so a busy machine doesn't decide the comparison
+        return min(asyncio.run(run(clients, broadcast)) for _ in range(3))
+
+    print()
+    print(f"  {'browsers':>8} {'legacy us':>10} {'shared us':>10}")
+    results = {}
+    for clients in (1, 4, 8):
+        results[clients] = measure(clients, "legacy"), measure(clients, "shared")
+        print(f"  {clients:>8} {results[clients][0]:>10.1f} {results[clients][1]:>10.1f}")
@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+from libraries.microdot.websocket import WebSocket
+from src.ws_input import WebsocketInput
+from src.ws_protocol import MSG_INPUT
+
+
+def _feed_all(pieces, max_text_bytes: int = None, dropped: list = None) -> list:
+    received = []
+
+    async def handler(data) -> None:
+        received.append(data)
+
+    async def on_drop(head: bytes) -> None:
+        dropped.append(head)
+
+    async def run():
+        kwargs = {'on_drop': on_drop if dropped is not None else None}
+        if max_text_bytes is not None:
+            kwargs['max_text_bytes'] = max_text_bytes
+        ws_input = WebsocketInput(handler, **kwargs)
+        for piece in pieces:
+            await ws_input.feed(*piece)
+
+    asyncio.run(run())
+    return received
+
+
+def test_text_messages_are_handed_over_whole():
+    message = json.dumps({'input': 'show ip route ✓'}).encode()
+    pieces = [
+        (WebSocket.TEXT, message[:10], False),
+        (WebSocket.TEXT, message[10:-1], False),
+        (WebSocket.TEXT, message[-1:], True),
+    ]
+
+    assert _feed_all(pieces) == [message.decode()]
+
+
+def test_input_fragments_stream_without_type_byte():
+    pieces = [
+        (WebSocket.BINARY, bytes([MSG_INPUT]) + b"conf t\n", False),
+        (WebSocket.BINARY, b"hostname R1\n", False),
+        (WebSocket.BINARY, b"end\n", True),
+        # not an input message: ignored, including its continuation
+        (WebSocket.BINARY, b"\x01junk", False),
+        (WebSocket.BINARY, b"more junk", True),
+    ]
+
+    assert _feed_all(pieces) == [b"conf t\n", b"hostname R1\n", b"end\n"]
+
+
+def test_oversized_text_message_is_dropped():
+    pieces = [
+        (WebSocket.TEXT, b'{"input": "' + b"x" * 60, False),
+        (WebSocket.TEXT, b"x" * 60 + b'"}', True),
+        (WebSocket.TEXT, b'{"input": "ok"}', True),
+    ]
+
+    dropped = []
+    assert _feed_all(pieces, max_text_bytes=100, dropped=dropped) == ['{"input": "ok"}']
+    assert dropped == [b'{"input": "xxxxx']
+
+
+def test_default_limit_keeps_16k_messages():
+    message = json.dumps({'input': 'x' * 12000}).encode()
+    assert _feed_all([(WebSocket.TEXT, message, True)]) == [message.decode()]
+
+
+def test_invalid_utf8_message_does_not_poison_later_ones():
+    pieces = [
+        (WebSocket.TEXT, b'\xc3', True),
+        (WebSocket.TEXT, b'{"input":"ok"}', True),
+        (WebSocket.TEXT, b'\xff\xfe', True),
+        (WebSocket.TEXT, b'{"input":', False),
+        (WebSocket.TEXT, b'"ok2"}', True),
+    ]
+
+    assert _feed_all(pieces) == ['{"input":"ok"}', '{"input":"ok2"}']
@@ -0,0 +1,67 @@
+import struct
+import time
+
+import src.ws_protocol as wp
+from libraries.microdot.websocket import WebSocket
+
+
+MESSAGES = [
+    ('activity', {'tx': False, 'rx': True}),
+    ('throughput', {'rx_bps': 11520, 'tx_bps': 42}),
+    ('system', {'mem_free': 182_304, 'mem_alloc': 297_120}),
+    ('output', {'output': ["Gi1/0/%d  connected  1  a-full  a-1000\n" % i for i in range(10)]}),
+]
+
+
+def test_telemetry_is_packed():
+    assert wp.encode_binary({'tx': True, 'rx': True}) == bytes([wp.MSG_ACTIVITY, 3])
+    assert wp.encode_binary({'tx': False, 'rx': True}) == bytes([wp.MSG_ACTIVITY, 1])
+    assert wp.encode_binary({'rx_bps': 1, 'tx_bps': 2}) == struct.pack('>BII', wp.MSG_THROUGHPUT, 1, 2)
+    assert wp.encode_binary({'mem_free': 3, 'mem_alloc': 4}) == struct.pack('>BII', wp.MSG_SYSTEM, 3, 4)
+    assert wp.encode_binary({'ws_clients': 2, 'ws_reaped': 5}) == struct.pack('>BHI', wp.MSG_WEBSOCKETS, 2, 5)
+
+
+def test_combined_telemetry_packs_records_back_to_back():
+    data = {'rx': True, 'tx': False, 'rx_bps': 1, 'tx_bps': 2, 'mem_free': 3, 'mem_alloc': 4,
+            'ws_clients': 1, 'ws_reaped': 0}
+
+    assert wp.encode_binary(data) == (
+        bytes([wp.MSG_ACTIVITY, 1])
+        + struct.pack('>BII', wp.MSG_THROUGHPUT, 1, 2)
+        + struct.pack('>BII', wp.MSG_SYSTEM, 3, 4)
+        + struct.pack('>BHI', wp.MSG_WEBSOCKETS, 1, 0)
+    )
+
+
+def test_output_is_raw_utf8():
+    payload = wp.encode_binary({'output': ["show ver\n", "✓ Router#"]})
+
+    assert payload[0] == wp.MSG_OUTPUT
+    assert payload[1:].decode() == "show ver\n✓ Router#"
+
+
+def test_unknown_message_has_no_binary_form():
+    assert wp.encode_binary({'message': 'hello'}) is None
+
+
+def test_benchmark_wire_bytes_and_cpu():
+    reps = 2000
+
+    print()
+    print(f"  {'message':<11} {'json B':>7} {'bin B':>7} {'json us':>8} {'bin us':>8}")
+    for name, data in MESSAGES:
+        json_frame = WebSocket.encode_frame(wp.encode_json(data))
+        bin_frame = WebSocket.encode_frame(wp.encode_binary(data))
+
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            WebSocket.encode_frame(wp.encode_json(data))
+        json_us = (time.perf_counter() - t0) / reps * 1e6
+
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            WebSocket.encode_frame(wp.encode_binary(data))
+        bin_us = (time.perf_counter() - t0) / reps * 1e6
+
+        print(f"  {name:<11} {len(json_frame):>7} {len(bin_frame):>7} {json_us:>8.2f} {bin_us:>8.2f}")
+        assert len(bin_frame) < len(json_frame)